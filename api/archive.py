@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedTask, ArchivedTaskTag, Task
+from .payloads import TASK_FIELDS
+from .tasks import bulk_delete_tasks
+
+ARCHIVE_CHUNK_SIZE = 1000
+
+
+def include_archived(params):
+    return params.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
+def archive_tasks(older_than, chunk_size=None, now=None):
+    """
+    Move COMPLETED and CANCELLED tasks that haven't changed for
+    ``older_than`` (a timedelta) into ``ArchivedTask`` along with their
+    tags, and return how many were moved.
+
+    Each chunk of at most ``chunk_size`` tasks is locked, copied and deleted
+    with ``bulk_delete_tasks`` in its own transaction. Moved tasks get tombstones, so sync clients see
+    them as deleted, and drop out of the stats counters.
+    """
+    now = now or timezone.now()
+    chunk_size = chunk_size or ARCHIVE_CHUNK_SIZE
+    finished = Task.objects.filter(
+        status__in=Task.FINISHED_STATUSES, updated_at__lt=now - older_than
+    ).order_by()
+    Through = Task.tags.through
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(finished.select_for_update().values(*TASK_FIELDS, 'updated_at')[:chunk_size])
+            if not rows:
+                return moved
+            pks = [row['id'] for row in rows]
+            links = list(Through.objects.filter(task_id__in=pks).values_list('task_id', 'tag_id'))
+
+            ArchivedTask.objects.bulk_create([ArchivedTask(archived_at=now, **row) for row in rows])
+            ArchivedTaskTag.objects.bulk_create([
+                ArchivedTaskTag(task_id=task_id, tag_id=tag_id) for task_id, tag_id in links
+            ])
+            bulk_delete_tasks(pks)
+        moved += len(rows)
+        if len(rows) < chunk_size:
+            return moved
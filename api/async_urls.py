@@ -0,0 +1,16 @@
+from django.urls import path
+from .async_views import task_create, task_delete, task_detail, task_list, task_update
+
+urlpatterns = [
+    path('tasks/', task_list, name='async-task-list'),     # Retrieve all tasks
+
+    path('tasks/create/', task_create, name='async-task-create'),    # Create a new task
+    path('tasks/create', task_create, name='async-task-create-no-slash'),    # Create a new task (no slash)
+
+    path('task/', task_detail, name='async-task-detail'),    # Retrieve a single task by ID
+
+    path('tasks/update/', task_update, name='async-task-update'),  # Update a task by ID
+    path('tasks/update', task_update, name='async-task-update-no-slash'),  # Update a task by ID (no slash)
+
+    path('tasks/delete', task_delete, name='async-task-delete'),  # Delete a task by ID
+]
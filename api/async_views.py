@@ -0,0 +1,286 @@
+import json
+from functools import wraps
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, QueryDict
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, ParseError
+from rest_framework.utils.mediatypes import media_type_matches, order_by_precedence
+
+from .archive import include_archived
+from .authentication import CachedBasicAuthentication, SignedTokenAuthentication
+from .cache import task_cache
+from .conditional import atable_etag, digest, etag_matches, make_etag
+from .filters import FilterError, filter_tasks, parse_fields
+from .models import ArchivedTask, Task
+from .pagination import PaginationError, apaginate_merged, apaginate_tasks
+from .parsers import MessagePackParser
+from .payloads import PAYLOAD_FIELDS, atask_payloads, row_fields
+from .renderers import MessagePackRenderer, msgpack
+from .serializers import TaskSerializer
+
+# Native async counterparts of the create, detail, list, update and delete
+# views. DRF's APIView is sync-only, so these are plain Django views that
+# keep the same URLs, parameters, authentication and response bodies, in
+# JSON or MessagePack.
+#
+# Reads use the async ORM for lookups, prefetches and iteration. Writes run
+# their transaction, and the signal handlers that keep caches and counters in
+# step, in a single sync_to_async call, since Django can't run transactions
+# in async code.
+
+AUTHENTICATION_CLASSES = [CachedBasicAuthentication, SignedTokenAuthentication]
+
+
+def _wants_msgpack(request):
+    # The choice DRF's content negotiation makes between the JSON and
+    # MessagePack renderers for this Accept header.
+    if msgpack is None:
+        return False
+    accepts = [token.strip() for token in request.META.get('HTTP_ACCEPT', '*/*').split(',')]
+    for media_types in order_by_precedence(accepts):
+        for media_type in ('application/json', MessagePackRenderer.media_type):
+            if any(media_type_matches(media_type, accepted) for accepted in media_types):
+                return media_type == MessagePackRenderer.media_type
+    return False
+
+
+def _response(request, data, **kwargs):
+    if _wants_msgpack(request):
+        return HttpResponse(
+            MessagePackRenderer().render(data), content_type=MessagePackRenderer.media_type, **kwargs
+        )
+    return JsonResponse(data, **kwargs)
+
+
+def _not_authenticated(request, detail):
+    response = _response(request, {'detail': detail}, status=status.HTTP_401_UNAUTHORIZED)
+    response['WWW-Authenticate'] = 'Basic realm="api"'
+    return response
+
+
+def _data(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+    if request.content_type == MessagePackParser.media_type and msgpack is not None:
+        return MessagePackParser().parse(BytesIO(request.body))
+    if request.method == 'POST':
+        return request.POST
+    return QueryDict(request.body)
+
+
+def async_api_view(*methods):
+    """
+    Restrict an async view to ``methods``, authenticate the request the way
+    the DRF views do and parse its body into ``request.data``.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @require_http_methods(methods)
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            user = None
+            try:
+                for authentication_class in AUTHENTICATION_CLASSES:
+                    result = await authentication_class().aauthenticate(request)
+                    if result is not None:
+                        user = result[0]
+                        break
+            except AuthenticationFailed as exc:
+                return _not_authenticated(request, str(exc.detail))
+            if user is None:
+                return _not_authenticated(request, 'Authentication credentials were not provided.')
+            request.user = user
+
+            try:
+                request.data = _data(request) if request.method != 'GET' else {}
+            except ParseError as exc:
+                return _response(request, {'detail': str(exc.detail)}, status=status.HTTP_400_BAD_REQUEST)
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+def _save(serializer):
+    with transaction.atomic():
+        serializer.save()
+    return serializer.data
+
+
+def _update(pk, data):
+    # Read, validate and save under a row lock, so the diff and the counter
+    # deltas start from the row's current state.
+    with transaction.atomic():
+        task = Task.objects.select_for_update().prefetch_related('tags').get(pk=pk)
+        serializer = TaskSerializer(task, data=data, partial=True)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        serializer.save()
+        return serializer.data, None
+
+
+def _delete(pk):
+    with transaction.atomic():
+        Task.objects.select_for_update().get(pk=pk).delete()
+
+
+@async_api_view('POST')
+async def task_create(request):
+    serializer = TaskSerializer(data=request.data)
+    if serializer.is_valid():
+        return _response(request, {
+            'message': 'Task created successfully',
+            'task': await sync_to_async(_save)(serializer)
+        }, status=status.HTTP_201_CREATED)
+    return _response(request, {
+        'message': 'Failed to create task',
+        'errors': serializer.errors
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@async_api_view('GET')
+async def task_detail(request):
+    task_id = request.GET.get('id')
+    if not task_id:
+        return _response(request, {
+            'message': 'ID parameter is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        pk = int(task_id)
+    except ValueError:
+        pk = None
+
+    try:
+        fields = parse_fields(request.GET)
+    except FilterError as exc:
+        return _response(request, {
+            'message': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    cached = await task_cache.aget(pk) if pk is not None else None
+    if cached is not None and fields != PAYLOAD_FIELDS:
+        payload = {field: cached[0][field] for field in fields}
+        cached = (payload, digest(payload))
+    elif cached is None:
+        columns = row_fields(fields)
+        rows = [row async for row in Task.objects.filter(pk=pk).values(*columns)] if pk is not None else []
+        payloads = await atask_payloads(rows, fields=fields)
+        if payloads:
+            cached = (payloads[0], digest(payloads[0]))
+            if fields == PAYLOAD_FIELDS:
+                await task_cache.aset(pk, cached)
+        elif pk is not None and include_archived(request.GET):
+            rows = [row async for row in ArchivedTask.objects.filter(pk=pk).values(*columns)]
+            payloads = await atask_payloads(rows, [ArchivedTask], fields)
+            if payloads:
+                cached = (payloads[0], digest(payloads[0]))
+        if cached is None:
+            return _response(request, {
+                'message': 'Task not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+    payload, payload_digest = cached
+    etag = make_etag(request, payload_digest)
+    if etag_matches(request, etag):
+        return _not_modified(etag)
+
+    response = _response(request, {
+        'message': 'Task retrieved successfully',
+        'task': payload
+    }, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    return response
+
+
+@async_api_view('GET')
+async def task_list(request):
+    etag = await atable_etag(request, 'task')
+    if etag_matches(request, etag):
+        return _not_modified(etag)
+
+    sources = [Task]
+    if include_archived(request.GET):
+        sources.append(ArchivedTask)
+
+    try:
+        fields = parse_fields(request.GET)
+        columns = row_fields(fields, 'id', 'timestamp')
+        querysets = [
+            filter_tasks(model.objects.all(), request.GET).values(*columns)
+            for model in sources
+        ]
+        if len(querysets) > 1:
+            rows, next_cursor = await apaginate_merged(querysets, request.GET)
+        else:
+            rows, next_cursor = await apaginate_tasks(querysets[0], request.GET)
+    except (FilterError, PaginationError) as exc:
+        return _response(request, {
+            'message': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    response = _response(request, {
+        'message': 'Tasks retrieved successfully',
+        'tasks': await atask_payloads(rows, sources, fields),
+        'next_cursor': next_cursor
+    }, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    return response
+
+
+@async_api_view('POST')
+async def task_update(request):
+    pk = request.data.get('pk')
+    if not pk:
+        return _response(request, {
+            'message': 'Task ID is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        data, errors = await sync_to_async(_update)(pk, request.data)
+    except Task.DoesNotExist:
+        return _response(request, {
+            'message': 'Task not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    if errors is None:
+        return _response(request, {
+            'message': 'Task updated successfully',
+            'task': data
+        }, status=status.HTTP_200_OK)
+    return _response(request, {
+        'message': 'Failed to update task',
+        'errors': errors
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@async_api_view('DELETE')
+async def task_delete(request):
+    pk = request.data.get('pk')
+    if not pk:
+        return _response(request, {
+            'message': 'Task ID is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        await sync_to_async(_delete)(pk)
+    except Task.DoesNotExist:
+        return _response(request, {
+            'message': 'Task not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return _response(request, {
+        'message': 'Task deleted successfully'
+    }, status=status.HTTP_204_NO_CONTENT)
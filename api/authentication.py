@@ -0,0 +1,164 @@
+import base64
+import binascii
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.authentication import (
+    BaseAuthentication, BasicAuthentication, get_authorization_header,
+)
+from rest_framework.exceptions import AuthenticationFailed
+
+from .cache import LRUCache
+
+CREDENTIAL_CACHE_SIZE = 1024
+CREDENTIAL_CACHE_TTL = 300
+TOKEN_MAX_AGE = 60 * 60 * 24
+TOKEN_SALT = 'api.authentication.token'
+
+# Maps a keyed digest of (username, password) to (user pk, password fingerprint).
+credential_cache = LRUCache(maxsize=CREDENTIAL_CACHE_SIZE, ttl=CREDENTIAL_CACHE_TTL)
+
+
+def _credential_key(userid, password):
+    return salted_hmac(
+        'api.authentication.credentials', f'{userid}\0{password}', algorithm='sha256'
+    ).hexdigest()
+
+
+def password_fingerprint(user):
+    """
+    A digest of the stored password hash, so anything derived from it stops
+    matching as soon as the password changes.
+    """
+    return salted_hmac(
+        'api.authentication.password', user.password, algorithm='sha256'
+    ).hexdigest()
+
+
+def _load_user(pk, fingerprint):
+    User = get_user_model()
+    try:
+        user = User._default_manager.get(pk=pk)
+    except User.DoesNotExist:
+        return None
+    if not user.is_active or not constant_time_compare(password_fingerprint(user), fingerprint):
+        return None
+    return user
+
+
+async def _aload_user(pk, fingerprint):
+    User = get_user_model()
+    try:
+        user = await User._default_manager.aget(pk=pk)
+    except User.DoesNotExist:
+        return None
+    if not user.is_active or not constant_time_compare(password_fingerprint(user), fingerprint):
+        return None
+    return user
+
+
+def invalidate_user(pk):
+    credential_cache.delete_where(lambda value: value[0] == pk)
+
+
+def issue_token(user):
+    return signing.dumps(
+        {'u': user.pk, 'p': password_fingerprint(user)}, salt=TOKEN_SALT, compress=True
+    )
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication that remembers successful verifications for a short
+    time, so the password hasher only runs on a cache miss.
+
+    A hit still loads the user and checks ``is_active`` and the password
+    fingerprint, so deactivating a user or changing their password takes
+    effect immediately.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = _credential_key(userid, password)
+        cached = credential_cache.get(key)
+        if cached is not None:
+            user = _load_user(*cached)
+            if user is not None:
+                return (user, None)
+            credential_cache.delete(key)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        credential_cache.set(key, (user.pk, password_fingerprint(user)))
+        return (user, auth)
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate`` for async views: a cache hit loads the user with the
+        async ORM, and only a miss goes to a thread to run the hasher.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != b'basic':
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Invalid basic header.')
+        try:
+            try:
+                decoded = base64.b64decode(auth[1]).decode('utf-8')
+            except UnicodeDecodeError:
+                decoded = base64.b64decode(auth[1]).decode('latin-1')
+            userid, password = decoded.split(':', 1)
+        except (TypeError, ValueError, binascii.Error):
+            raise AuthenticationFailed('Invalid basic header. Credentials not correctly base64 encoded.')
+
+        cached = credential_cache.get(_credential_key(userid, password))
+        if cached is not None:
+            user = await _aload_user(*cached)
+            if user is not None:
+                return (user, None)
+        return await sync_to_async(self.authenticate_credentials)(userid, password, request)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Stateless tokens issued by ``TokenObtainView``, sent as
+    ``Authorization: Token <token>``.
+    """
+    keyword = 'Token'
+
+    def _decode(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Invalid token header.')
+
+        try:
+            token = auth[1].decode()
+            data = signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+            return token, data['u'], data['p']
+        except (signing.BadSignature, UnicodeError, KeyError, TypeError):
+            raise AuthenticationFailed('Invalid or expired token.')
+
+    def authenticate(self, request):
+        decoded = self._decode(request)
+        if decoded is None:
+            return None
+        token, pk, fingerprint = decoded
+        user = _load_user(pk, fingerprint)
+        if user is None:
+            raise AuthenticationFailed('Invalid or expired token.')
+        return (user, token)
+
+    async def aauthenticate(self, request):
+        decoded = self._decode(request)
+        if decoded is None:
+            return None
+        token, pk, fingerprint = decoded
+        user = await _aload_user(pk, fingerprint)
+        if user is None:
+            raise AuthenticationFailed('Invalid or expired token.')
+        return (user, token)
+
+    def authenticate_header(self, request):
+        return self.keyword
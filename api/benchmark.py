@@ -0,0 +1,267 @@
+import base64
+import json
+import math
+import platform
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import django
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+SEED_BATCH_SIZE = 1000
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not values:
+        return None
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+class ClientDriver:
+    """
+    Sends requests through Django's test client in this process, counting
+    the SQL queries each one runs.
+    """
+    target = 'test-client'
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, content_type='application/json', headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(raise_request_exception=False)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.generic(
+                method, f'/todo/{path}', body or '', content_type=content_type, headers=headers
+            )
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, content, len(queries)
+
+    def close(self):
+        connection.close()
+
+
+class HTTPDriver:
+    """
+    Sends requests to a running server. Query counts aren't visible from
+    outside the server, so they are reported as ``None``.
+    """
+
+    def __init__(self, base_url):
+        self.target = base_url.rstrip('/')
+
+    def request(self, method, path, body=None, content_type='application/json', headers=None):
+        request = urllib.request.Request(
+            f'{self.target}/todo/{path}', data=body, method=method,
+            headers={'Content-Type': content_type, **(headers or {})},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read(), None
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read(), None
+
+    def close(self):
+        pass
+
+
+class Benchmark:
+    """
+    Seeds ``tasks`` tasks spread over ``tags`` tags through the bulk create
+    endpoint, then drives every task endpoint ``requests`` times from
+    ``concurrency`` threads and collects latency percentiles, throughput,
+    queries per request and peak RSS.
+    """
+
+    def __init__(self, driver, username, password, tasks=1000, tags=20, requests=200,
+                 concurrency=4, seed=0):
+        self.driver = driver
+        self.basic = 'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()
+        self.tasks = tasks
+        self.tags = [f'tag-{i}' for i in range(tags)]
+        self.requests = requests
+        self.concurrency = concurrency
+        self.random = random.Random(seed)
+        self.headers = None
+        self.task_ids = []
+
+    def call(self, method, path, payload=None, raw=None, content_type='application/json', headers=None):
+        body = raw if raw is not None else (json.dumps(payload).encode() if payload is not None else None)
+        return self.driver.request(method, path, body, content_type, headers or self.headers)
+
+    def new_task(self, i):
+        return {
+            'title': f'Benchmark task {i}',
+            'description': f'Seeded task number {i} for benchmarking.',
+            'due_date': f'2025-{i % 12 + 1:02}-{i % 28 + 1:02}',
+            'status': 'OPEN',
+            'tags': [{'name': name} for name in self.random.sample(self.tags, min(3, len(self.tags)))],
+        }
+
+    def seed(self):
+        code, content, _ = self.call('POST', 'auth/token/', headers={'Authorization': self.basic})
+        if code != 200:
+            raise RuntimeError(f'Could not obtain a token ({code}): {content[:200]!r}')
+        self.headers = {'Authorization': f"Token {json.loads(content)['token']}"}
+
+        for start in range(0, self.tasks, SEED_BATCH_SIZE):
+            batch = [self.new_task(i) for i in range(start, min(start + SEED_BATCH_SIZE, self.tasks))]
+            code, content, _ = self.call('POST', 'tasks/bulk_create/', batch)
+            if code != 201:
+                raise RuntimeError(f'Seeding failed ({code}): {content[:200]!r}')
+            self.task_ids += [task['id'] for task in json.loads(content)['tasks']]
+
+    def scenarios(self):
+        """
+        ``(label, make_request)`` for every endpoint, where ``make_request(i)``
+        sends the i-th request. Deletes run last and consume seeded tasks.
+        """
+        pick = self.random.choice
+        ids = self.task_ids
+        deletable = iter(ids[len(ids) - self.requests:] if len(ids) >= self.requests else ids)
+        lock = threading.Lock()
+
+        def delete(i):
+            with lock:
+                pk = next(deletable, None)
+            return self.call('DELETE', 'tasks/delete', {'pk': pk or 0})
+
+        ndjson = '\n'.join(json.dumps(self.new_task(i)) for i in range(10)).encode()
+        return [
+            ('POST auth/token/', lambda i: self.call('POST', 'auth/token/', headers={'Authorization': self.basic})),
+            ('GET tasks/', lambda i: self.call('GET', 'tasks/?limit=50')),
+            ('GET tasks/ (filtered)', lambda i: self.call('GET', f'tasks/?status=OPEN&tag={pick(self.tags)}')),
+            ('GET tasks/changes', lambda i: self.call('GET', 'tasks/changes?limit=100')),
+            ('GET tasks/export', lambda i: self.call('GET', 'tasks/export')),
+            ('GET tasks/search', lambda i: self.call('GET', 'tasks/search?q=seeded+bench')),
+            ('GET tasks/stats', lambda i: self.call('GET', 'tasks/stats')),
+            ('GET task/', lambda i: self.call('GET', f'task/?id={pick(ids)}')),
+            ('POST tasks/create/', lambda i: self.call('POST', 'tasks/create/', self.new_task(i))),
+            ('POST tasks/bulk_create/', lambda i: self.call(
+                'POST', 'tasks/bulk_create/', [self.new_task(i) for _ in range(10)]
+            )),
+            ('POST tasks/import', lambda i: self.call(
+                'POST', 'tasks/import', raw=ndjson, content_type='application/x-ndjson'
+            )),
+            ('POST tasks/update/', lambda i: self.call(
+                'POST', 'tasks/update/', {'pk': pick(ids), 'status': pick(['WORKING', 'OPEN'])}
+            )),
+            ('POST tasks/batch/', lambda i: self.call('POST', 'tasks/batch/', [
+                {'op': 'update', 'pk': pk, 'title': f'Batch {i}'} for pk in self.random.sample(ids, min(10, len(ids)))
+            ])),
+            ('DELETE tasks/delete', delete),
+        ]
+
+    def measure(self, make_request):
+        samples = []
+        remaining = iter(range(self.requests))
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    i = next(remaining, None)
+                if i is None:
+                    return
+                started = time.perf_counter()
+                code, _, queries = make_request(i)
+                samples.append((time.perf_counter() - started, code, queries))
+
+        def thread_worker():
+            try:
+                worker()
+            finally:
+                self.driver.close()
+
+        started = time.perf_counter()
+        if self.concurrency == 1:
+            # Stay on this thread and its database connection.
+            worker()
+        else:
+            threads = [threading.Thread(target=thread_worker) for _ in range(self.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(sample[0] * 1000 for sample in samples)
+        queries = [sample[2] for sample in samples if sample[2] is not None]
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for sample in samples if sample[1] >= 400),
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'mean_ms': sum(latencies) / len(latencies) if latencies else None,
+            'throughput_rps': len(samples) / elapsed if elapsed else None,
+            'queries_per_request': sum(queries) / len(queries) if queries else None,
+            'peak_rss_kb': peak_rss_kb(),
+        }
+
+    def run(self, on_result=None):
+        self.seed()
+        results = {
+            'meta': {
+                'target': self.driver.target,
+                'tasks': self.tasks,
+                'tags': len(self.tags),
+                'requests': self.requests,
+                'concurrency': self.concurrency,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'started': timezone.now().isoformat(),
+            },
+            'endpoints': {},
+        }
+        for label, make_request in self.scenarios():
+            result = self.measure(make_request)
+            results['endpoints'][label] = result
+            if on_result:
+                on_result(label, result)
+        results['peak_rss_kb'] = peak_rss_kb()
+        return results
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Compare each endpoint's p95 latency, throughput and queries per request
+    with ``baseline``. Returns ``[(label, metric, base, current, change,
+    regressed)]`` for every metric both runs have.
+    """
+    rows = []
+    for label, current in results['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(label)
+        if not base:
+            continue
+        for metric, higher_is_worse in (('p95_ms', True), ('throughput_rps', False), ('queries_per_request', True)):
+            if current.get(metric) is None or not base.get(metric):
+                continue
+            change = current[metric] / base[metric] - 1
+            regressed = change > tolerance if higher_is_worse else change < -tolerance
+            rows.append((label, metric, base[metric], current[metric], change, regressed))
+    return rows
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+TASK_CACHE_SIZE = 4096
+TASK_CACHE_TTL = 300
+TASK_CACHE_LOCAL_TTL = 5
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe LRU mapping with an optional per-entry TTL.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return default
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        ttl = timeout or self.ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [key for key, (value, _) in self._data.items() if predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TaskPayloadCache:
+    """
+    Read-through cache of serialized task payloads keyed by pk.
+
+    Entries live in a process-local LRU unless ``TASK_CACHE_ALIAS`` names one
+    of Django's caches, in which case every worker shares them. Invalidation
+    only reaches the local LRU of the worker that made the write, so other
+    workers can serve a stale payload until it expires; local entries are
+    therefore kept for just ``TASK_CACHE_LOCAL_TTL`` seconds, and shared
+    ones for ``ttl``.
+    """
+    key_prefix = 'api:task:'
+
+    def __init__(self, maxsize=TASK_CACHE_SIZE, ttl=TASK_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = LRUCache(maxsize=maxsize, ttl=TASK_CACHE_LOCAL_TTL)
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        alias = getattr(settings, 'TASK_CACHE_ALIAS', None)
+        return caches[alias] if alias else self._local
+
+    def _key(self, pk):
+        return f'{self.key_prefix}{pk}'
+
+    def get(self, pk):
+        return self._count(self.backend.get(self._key(pk)))
+
+    def _count(self, payload):
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return payload
+
+    async def aget(self, pk):
+        backend = self.backend
+        if backend is self._local:
+            return self.get(pk)
+        return self._count(await backend.aget(self._key(pk)))
+
+    def _timeout(self, backend, timeout):
+        if backend is self._local:
+            local_ttl = getattr(settings, 'TASK_CACHE_LOCAL_TTL', TASK_CACHE_LOCAL_TTL)
+            return min(timeout or local_ttl, local_ttl)
+        return timeout or self.ttl
+
+    def set(self, pk, payload, timeout=None):
+        backend = self.backend
+        backend.set(self._key(pk), payload, self._timeout(backend, timeout))
+
+    async def aset(self, pk, payload):
+        backend = self.backend
+        if backend is self._local:
+            self.set(pk, payload)
+        else:
+            await backend.aset(self._key(pk), payload, self.ttl)
+
+    def delete_many(self, pks):
+        self.backend.delete_many([self._key(pk) for pk in pks])
+
+    def clear(self):
+        """
+        Empty the process-local LRU. A shared Django cache is left alone.
+        """
+        self._local.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+task_cache = TaskPayloadCache()
+
+
+def invalidate_tasks(pks):
+    """
+    Drop cached payloads for ``pks`` now, and again once the surrounding
+    transaction commits so a concurrent read can't re-cache the old rows.
+    Also bumps the task table version that list ETags are built from.
+    """
+    from .models import TableVersion
+
+    pks = list(pks)
+    if not pks:
+        return
+    task_cache.delete_many(pks)
+    TableVersion.bump('task')
+    transaction.on_commit(lambda: task_cache.delete_many(pks))
@@ -0,0 +1,40 @@
+import hashlib
+import json
+
+from django.utils.cache import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import TableVersion
+
+
+def digest(payload):
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def make_etag(request, marker):
+    """
+    A strong ETag for ``marker`` as seen through this request's URL and
+    ``Accept`` header, so each query and representation gets its own tag.
+    """
+    key = f'{marker}|{request.get_full_path()}|{request.META.get("HTTP_ACCEPT", "")}'
+    return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+
+def table_etag(request, *tables):
+    return make_etag(request, TableVersion.current(*tables))
+
+
+async def atable_etag(request, *tables):
+    return make_etag(request, await TableVersion.acurrent(*tables))
+
+
+def etag_matches(request, etag):
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return '*' in etags or any(tag.removeprefix('W/') == etag for tag in etags)
+
+
+def not_modified(etag):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
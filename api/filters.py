@@ -0,0 +1,101 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Task
+from .payloads import PAYLOAD_FIELDS
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _values(params, name):
+    return [value for raw in params.getlist(name) for value in raw.split(',') if value]
+
+
+def _date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise FilterError(f'Invalid {name}')
+    return parsed
+
+
+def _datetime(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None and parse_date(value) is not None:
+            parsed = datetime.datetime.combine(parse_date(value), datetime.time())
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise FilterError(f'Invalid {name}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_fields(params):
+    """
+    The payload fields asked for with ``fields`` (comma-separated or
+    repeated), in ``PAYLOAD_FIELDS`` order; every field when it's absent.
+    """
+    requested = _values(params, 'fields')
+    if not requested:
+        return PAYLOAD_FIELDS
+    unknown = set(requested) - set(PAYLOAD_FIELDS)
+    if unknown:
+        raise FilterError(f'Invalid fields: {", ".join(sorted(unknown))}')
+    return tuple(field for field in PAYLOAD_FIELDS if field in requested)
+
+
+def filter_tasks(queryset, params):
+    """
+    Apply the list filters in ``params`` to ``queryset``:
+
+    - ``status``: one or more statuses, comma-separated or repeated.
+    - ``due_after`` / ``due_before``: inclusive ``due_date`` bounds.
+    - ``created_after`` / ``created_before``: ``timestamp`` bounds, the
+      lower inclusive and the upper exclusive.
+    - ``tag``: one or more tag names; tasks with any of them match.
+
+    Each filter is served by an index: ``(status, due_date)``, ``due_date``,
+    ``(timestamp, id)`` and the tag side of the through table. ``queryset``
+    may be over ``Task`` or ``ArchivedTask``.
+    """
+    statuses = _values(params, 'status')
+    if statuses:
+        valid = {choice for choice, _ in Task.STATUS_CHOICES}
+        if not set(statuses) <= valid:
+            raise FilterError('Invalid status')
+        queryset = queryset.filter(status__in=statuses)
+
+    due_after, due_before = _date(params, 'due_after'), _date(params, 'due_before')
+    if due_after:
+        queryset = queryset.filter(due_date__gte=due_after)
+    if due_before:
+        queryset = queryset.filter(due_date__lte=due_before)
+
+    created_after = _datetime(params, 'created_after')
+    created_before = _datetime(params, 'created_before')
+    if created_after:
+        queryset = queryset.filter(timestamp__gte=created_after)
+    if created_before:
+        queryset = queryset.filter(timestamp__lt=created_before)
+
+    tags = _values(params, 'tag')
+    if tags:
+        # A subquery rather than a join, so a task with several matching
+        # tags is still returned once.
+        queryset = queryset.filter(pk__in=queryset.model.tags.through.objects.filter(
+            tag__name__in=tags
+        ).values('task_id'))
+
+    return queryset
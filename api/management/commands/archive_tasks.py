@@ -0,0 +1,32 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import ARCHIVE_CHUNK_SIZE, archive_tasks
+
+
+class Command(BaseCommand):
+    help = 'Move COMPLETED and CANCELLED tasks that have not changed for a while into the archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, required=True, metavar='DAYS',
+            help='Archive finished tasks last updated more than this many days ago.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=ARCHIVE_CHUNK_SIZE,
+            help=f'Tasks to move per transaction (default {ARCHIVE_CHUNK_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0:
+            raise CommandError('--older-than must not be negative.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        started = time.monotonic()
+        moved = archive_tasks(
+            datetime.timedelta(days=options['older_than']), chunk_size=options['chunk_size']
+        )
+        self.stdout.write(f'Archived {moved} tasks in {time.monotonic() - started:.2f}s')
@@ -0,0 +1,79 @@
+import json
+import statistics
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Task
+from api.payloads import TASK_FIELDS, task_payloads
+from api.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+STATUSES = [value for value, _ in Task.STATUS_CHOICES]
+
+
+def sample_tasks(count):
+    return [
+        {
+            'id': i,
+            'title': f'Task {i}',
+            'description': f'Description of task {i}, long enough to look like a real one.',
+            'timestamp': f'2024-12-03T21:{i // 60 % 60:02}:{i % 60:02}.482397Z',
+            'due_date': f'2025-01-{i % 28 + 1:02}' if i % 3 else None,
+            'status': STATUSES[i % len(STATUSES)],
+            'tags': [{'id': tag, 'name': f'tag-{tag}'} for tag in range(i % 4)],
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON and MessagePack payload size and encode/decode time for a task list.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help='Tasks in the payload (default 500).')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per measurement (default 50).')
+        parser.add_argument(
+            '--from-db', action='store_true',
+            help='Use the first --count tasks in the database instead of generated ones.',
+        )
+
+    def handle(self, *args, **options):
+        if msgpack is None:
+            raise CommandError('The msgpack package is not installed.')
+        if options['count'] < 1 or options['repeat'] < 1:
+            raise CommandError('--count and --repeat must be at least 1.')
+
+        if options['from_db']:
+            rows = Task.objects.order_by('id').values(*TASK_FIELDS)[:options['count']]
+            tasks = task_payloads(rows)
+        else:
+            tasks = sample_tasks(options['count'])
+        data = {'message': 'Tasks retrieved successfully', 'tasks': tasks, 'next_cursor': None}
+
+        formats = [
+            ('json', FastJSONRenderer().render, orjson.loads if orjson else json.loads),
+            ('json-stdlib', JSONRenderer().render, json.loads),
+            ('msgpack', MessagePackRenderer().render, partial(msgpack.unpackb, raw=False)),
+        ]
+        json_size = None
+        self.stdout.write(f"{len(tasks)} tasks, median of {options['repeat']} runs")
+        for name, encode, decode in formats:
+            body = encode(data)
+            json_size = json_size or len(body)
+            encode_ms = median_ms(lambda: encode(data), options['repeat'])
+            decode_ms = median_ms(lambda: decode(body), options['repeat'])
+            self.stdout.write(
+                f'{name:<12} {len(body):>10} bytes ({len(body) / json_size:6.1%})'
+                f'  encode {encode_ms:8.3f} ms  decode {decode_ms:8.3f} ms'
+            )
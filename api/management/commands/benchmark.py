@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from api.benchmark import Benchmark, ClientDriver, HTTPDriver, compare
+
+
+def fmt(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed tasks and drive every API endpoint at a fixed concurrency, reporting latency '
+        'percentiles, throughput, queries per request and peak RSS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000, help='Tasks to seed (default 1000).')
+        parser.add_argument('--tags', type=int, default=20, help='Distinct tags to spread them over (default 20).')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint (default 200).')
+        parser.add_argument('--concurrency', type=int, default=4, help='Concurrent clients (default 4).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable runs.')
+        parser.add_argument(
+            '--url',
+            help='Benchmark a running server at this base URL instead of a throwaway test database. '
+                 'It must accept --username/--password, and tasks are seeded into its database.',
+        )
+        parser.add_argument('--username', default='benchmark')
+        parser.add_argument('--password', default='benchmark')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--baseline', help='Compare against results previously written with --output.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.1,
+            help='Allowed relative p95/throughput change before a metric counts as regressed (default 0.1).',
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit non-zero if anything regressed against --baseline.',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('tasks', 'tags', 'requests', 'concurrency'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be at least 1.')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as source:
+                    baseline = json.load(source)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Could not read baseline: {exc}')
+
+        def report(label, result):
+            self.stdout.write(
+                f"{label:<24} p50 {fmt(result['p50_ms'], '8.2f')} ms  p95 {fmt(result['p95_ms'], '8.2f')} ms"
+                f"  p99 {fmt(result['p99_ms'], '8.2f')} ms  {fmt(result['throughput_rps'], '8.1f')} req/s"
+                f"  {fmt(result['queries_per_request'], '5.1f')} queries  {result['errors']} errors"
+            )
+
+        settings = {
+            key: options[key] for key in ('tasks', 'tags', 'requests', 'concurrency', 'seed')
+        }
+        if options['url']:
+            benchmark = Benchmark(HTTPDriver(options['url']), options['username'], options['password'], **settings)
+            results = self.run(benchmark, report)
+        else:
+            test_settings = connection.settings_dict['TEST']
+            temp_dir = None
+            if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+                # SQLite's shared in-memory test database fails concurrent
+                # writes with "table is locked", and deferred transactions
+                # fail with "database is locked"; a file and IMMEDIATE
+                # transactions make writers queue up instead.
+                temp_dir = tempfile.TemporaryDirectory()
+                test_settings['NAME'] = os.path.join(temp_dir.name, 'benchmark.sqlite3')
+                connection.settings_dict['OPTIONS'].setdefault('transaction_mode', 'IMMEDIATE')
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+            try:
+                User.objects.create_user(username=options['username'], password=options['password'])
+                benchmark = Benchmark(ClientDriver(), options['username'], options['password'], **settings)
+                results = self.run(benchmark, report)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+                if temp_dir is not None:
+                    test_settings['NAME'] = None
+                    temp_dir.cleanup()
+
+        self.stdout.write(f"Peak RSS: {fmt(results['peak_rss_kb'], 'd')} KB")
+        if options['output']:
+            with open(options['output'], 'w') as target:
+                json.dump(results, target, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            self.compare(results, baseline, options)
+
+    def run(self, benchmark, report):
+        try:
+            return benchmark.run(report)
+        except RuntimeError as exc:
+            raise CommandError(exc)
+
+    def compare(self, results, baseline, options):
+        regressions = 0
+        for label, metric, base, current, change, regressed in compare(results, baseline, options['tolerance']):
+            regressions += regressed
+            line = f'{label:<24} {metric:<20} {base:10.2f} -> {current:10.2f} ({change:+.1%})'
+            self.stdout.write(self.style.ERROR(line + '  REGRESSED') if regressed else line)
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{regressions} metrics regressed against the baseline.')
+        self.stdout.write(f'{regressions} metrics regressed against the baseline.')
@@ -0,0 +1,40 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ndjson import IMPORT_BATCH_SIZE, import_tasks
+
+
+class Command(BaseCommand):
+    help = 'Import tasks from a newline-delimited JSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON file to read, or - for stdin.')
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help=f'Tasks to insert per transaction (default {IMPORT_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        def progress(report):
+            self.stdout.write(f"Imported {report['imported']} tasks ({report['failed']} failed lines)")
+
+        def error(error):
+            self.stderr.write(f"Line {error['line']}: {json.dumps(error['errors'])}")
+
+        if options['path'] == '-':
+            report = import_tasks(sys.stdin, options['batch_size'], progress, error)
+        else:
+            try:
+                with open(options['path'], 'rb') as lines:
+                    report = import_tasks(lines, options['batch_size'], progress, error)
+            except OSError as exc:
+                raise CommandError(exc)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: imported {report['imported']} tasks, {report['failed']} lines failed."
+        ))
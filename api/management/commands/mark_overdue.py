@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.overdue import OVERDUE_CHUNK_SIZE, mark_overdue
+
+
+class Command(BaseCommand):
+    help = 'Mark unfinished tasks whose due date has passed as OVERDUE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=OVERDUE_CHUNK_SIZE,
+            help=f'Tasks to update per statement (default {OVERDUE_CHUNK_SIZE}).',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, sweeping once every --interval seconds.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=300,
+            help='Seconds between the start of one pass and the next with --loop (default 300).',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+
+        try:
+            while True:
+                started = time.monotonic()
+                touched = mark_overdue(chunk_size=options['chunk_size'])
+                elapsed = time.monotonic() - started
+                self.stdout.write(f'Marked {touched} tasks overdue in {elapsed:.2f}s')
+                if not options['loop']:
+                    return
+                time.sleep(max(0, options['interval'] - elapsed))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
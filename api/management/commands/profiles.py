@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import (
+    PROFILE_TOP_FUNCTIONS, format_stats, issue_profile_token, list_profile_ids, load_summary, profile_dir,
+)
+
+
+class Command(BaseCommand):
+    help = 'List and summarize request profiles captured by ProfilingMiddleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action', nargs='?', default='list', choices=['list', 'show', 'token'],
+            help='list saved profiles (default), show one, or print an X-Profile header value.',
+        )
+        parser.add_argument('profile_id', nargs='?', help='Profile to show; defaults to the latest.')
+        parser.add_argument(
+            '--limit', type=int, default=PROFILE_TOP_FUNCTIONS,
+            help=f'Profiles to list, or functions to show (default {PROFILE_TOP_FUNCTIONS}).',
+        )
+        parser.add_argument(
+            '--sort', default='cumulative', choices=['cumulative', 'tottime', 'calls'],
+            help='Function ordering for show (default cumulative).',
+        )
+
+    def handle(self, *args, **options):
+        if options['action'] == 'token':
+            self.stdout.write(f'X-Profile: {issue_profile_token()}')
+            return
+
+        ids = list_profile_ids()
+        if options['action'] == 'list':
+            self.stdout.write(f'{len(ids)} profiles in {profile_dir()}')
+            for profile_id in reversed(ids[-options['limit']:]):
+                summary = load_summary(profile_id)
+                self.stdout.write(
+                    f"{profile_id}  {summary['status']}  {summary['duration_ms']:9.1f} ms"
+                    f"  {summary['query_count']:4} queries {summary['query_ms']:8.1f} ms"
+                    f"  {summary['method']} {summary['path']}"
+                )
+            return
+
+        profile_id = options['profile_id'] or (ids[-1] if ids else None)
+        if profile_id not in ids:
+            raise CommandError(f'No profile {profile_id!r}.' if profile_id else 'No profiles saved yet.')
+        summary = load_summary(profile_id)
+        self.stdout.write(
+            f"{summary['method']} {summary['path']} -> {summary['status']} "
+            f"({summary['view']}) in {summary['duration_ms']} ms"
+        )
+        self.stdout.write(f"{summary['query_count']} queries in {summary['query_ms']} ms:")
+        for query in summary['queries']:
+            self.stdout.write(f"  {query['ms']:8.3f} ms  {query['sql']}")
+        self.stdout.write(format_stats(profile_id, options['limit'], options['sort']))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.stats import counter_drift, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the task statistics counters from the task tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report counters that have drifted; exit non-zero if any have.',
+        )
+
+    def handle(self, *args, **options):
+        drift = counter_drift()
+        for (bucket, key), (stored, actual) in drift.items():
+            self.stdout.write(f'{bucket} {key}: stored {stored}, actual {actual}')
+
+        if options['check']:
+            if drift:
+                raise CommandError(f'{len(drift)} counters have drifted.')
+            self.stdout.write(self.style.SUCCESS('All counters match.'))
+            return
+
+        counts = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(counts)} counters ({len(drift)} had drifted).'
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.routers import replica_aliases, sync_sqlite_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary over the SQLite files standing in for DATABASE_REPLICAS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running, copying once every --interval seconds to simulate replication lag.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds between the start of one copy and the next with --loop (default 5).',
+        )
+
+    def handle(self, *args, **options):
+        if not replica_aliases():
+            raise CommandError('DATABASE_REPLICAS is empty.')
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive.')
+
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    aliases = sync_sqlite_replicas()
+                except ValueError as exc:
+                    raise CommandError(str(exc))
+                elapsed = time.monotonic() - started
+                self.stdout.write(f'Copied the primary to {", ".join(aliases)} in {elapsed:.2f}s')
+                if not options['loop']:
+                    return
+                time.sleep(max(0, options['interval'] - elapsed))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
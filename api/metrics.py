@@ -0,0 +1,191 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from .cache import task_cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_FLUSH_INTERVAL = 1.0
+
+COUNTERS = {
+    'api_requests_total': 'Requests handled.',
+    'api_db_queries_total': 'SQL queries run while handling requests.',
+    'api_db_query_seconds_total': 'Time spent in SQL queries while handling requests.',
+    'api_render_seconds_total': 'Time spent rendering response bodies.',
+    'api_response_bytes_total': 'Response body bytes sent.',
+}
+CACHE_COUNTERS = {
+    'api_task_cache_hits_total': 'Task payload cache hits.',
+    'api_task_cache_misses_total': 'Task payload cache misses.',
+}
+HISTOGRAM = 'api_request_duration_seconds'
+LABELS = ('view', 'method', 'status')
+
+
+class MetricsRegistry:
+    """
+    Request metrics for this process, keyed by ``(view, method, status)``.
+
+    With ``METRICS_DIR`` set, every process writes a snapshot of its metrics
+    to its own file there at most once per ``METRICS_FLUSH_INTERVAL``
+    seconds, and ``render`` sums the snapshots of all of them. Files of
+    exited workers are kept so totals never go backwards; empty the
+    directory when the whole service restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._last_flush = 0.0
+        self._file = None
+
+    def observe(self, labels, seconds, queries, query_seconds, render_seconds, size):
+        with self._lock:
+            self._counters['api_requests_total', labels] += 1
+            self._counters['api_db_queries_total', labels] += queries
+            self._counters['api_db_query_seconds_total', labels] += query_seconds
+            self._counters['api_render_seconds_total', labels] += render_seconds
+            self._counters['api_response_bytes_total', labels] += size
+            buckets = self._histograms.get(labels)
+            if buckets is None:
+                # One slot per bucket, then +Inf, then the sum.
+                buckets = self._histograms[labels] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[len(LATENCY_BUCKETS)] += 1
+            buckets[-1] += seconds
+        self.maybe_flush()
+
+    def add_streamed(self, labels, size, queries, query_seconds):
+        with self._lock:
+            self._counters['api_response_bytes_total', labels] += size
+            self._counters['api_db_queries_total', labels] += queries
+            self._counters['api_db_query_seconds_total', labels] += query_seconds
+
+    def snapshot(self):
+        stats = task_cache.stats()
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[list(labels), list(buckets)] for labels, buckets in self._histograms.items()],
+                'cache': [stats['hits'], stats['misses']],
+            }
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        directory = self.directory
+        if not directory:
+            return
+        self._last_flush = time.monotonic()
+        if self._file is None:
+            # The start time keeps a recycled pid from overwriting a dead
+            # worker's totals.
+            self._file = os.path.join(directory, f'metrics-{os.getpid()}-{time.time_ns()}.json')
+        fd, path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as target:
+            json.dump(self.snapshot(), target)
+        os.replace(path, self._file)
+
+    def snapshots(self):
+        directory = self.directory
+        if not directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for name in os.listdir(directory):
+            if name.startswith('metrics-') and name.endswith('.json'):
+                try:
+                    with open(os.path.join(directory, name)) as source:
+                        snapshots.append(json.load(source))
+                except (OSError, ValueError):
+                    continue
+        return snapshots
+
+    def render(self):
+        """
+        Every process's metrics, summed, in the Prometheus text format.
+        """
+        counters = defaultdict(float)
+        histograms = {}
+        cache = [0, 0]
+        for snapshot in self.snapshots():
+            for name, labels, value in snapshot['counters']:
+                counters[name, tuple(labels)] += value
+            for labels, buckets in snapshot['histograms']:
+                total = histograms.setdefault(tuple(labels), [0] * len(buckets))
+                for i, value in enumerate(buckets):
+                    total[i] += value
+            cache = [cache[0] + snapshot['cache'][0], cache[1] + snapshot['cache'][1]]
+
+        lines = []
+        for name, help_text in COUNTERS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            lines += [
+                f'{name}{{{_labels(labels)}}} {_number(value)}'
+                for (metric, labels), value in sorted(counters.items()) if metric == name
+            ]
+
+        lines += [f'# HELP {HISTOGRAM} Request latency.', f'# TYPE {HISTOGRAM} histogram']
+        for labels, buckets in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+                cumulative += count
+                lines.append(f'{HISTOGRAM}_bucket{{{_labels(labels)},le="{bound}"}} {cumulative}')
+            lines.append(f'{HISTOGRAM}_sum{{{_labels(labels)}}} {_number(buckets[-1])}')
+            lines.append(f'{HISTOGRAM}_count{{{_labels(labels)}}} {cumulative}')
+
+        for (name, help_text), value in zip(CACHE_COUNTERS.items(), cache):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(LABELS, labels))
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+registry = MetricsRegistry()
+
+
+def metrics_allowed(request):
+    """
+    Whether ``request`` may read ``/metrics``: it comes from an address in
+    ``METRICS_ALLOWED_IPS`` or carries ``Authorization: Bearer
+    <METRICS_TOKEN>``. With neither setting, nobody may.
+    """
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ()):
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    scheme, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and constant_time_compare(credentials, token)
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
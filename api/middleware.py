@@ -0,0 +1,278 @@
+import cProfile
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+from .profiling import PROFILE_MAX_STATEMENTS, profile_requested, save_profile
+
+
+# The recorders of the requests the current context is running. A
+# ContextVar, so queries the async ORM runs in sync_to_async threads are
+# still credited to the request that made them, and only to it.
+_recorders = ContextVar('api_query_recorders', default=())
+
+
+def record_queries(execute, sql, params, many, context):
+    recorders = _recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        for recorder in recorders:
+            recorder.record(sql, seconds)
+
+
+def watch_connections():
+    # Connections belong to the thread using them, so this has to run in
+    # the thread that will query. The wrapper stays installed; it does
+    # nothing outside ``recording``.
+    for connection in connections.all():
+        if record_queries not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_queries)
+
+
+class QueryRecorder:
+    """
+    Counts and times the queries run inside ``recording(recorder)``.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def record(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+
+
+class StatementRecorder(QueryRecorder):
+    """
+    ``QueryRecorder`` that also keeps the first ``limit`` statements with
+    their timings.
+    """
+
+    def __init__(self, limit=PROFILE_MAX_STATEMENTS):
+        super().__init__()
+        self.limit = limit
+        self.statements = []
+
+    def record(self, sql, seconds):
+        super().record(sql, seconds)
+        if len(self.statements) < self.limit:
+            self.statements.append({'sql': sql, 'ms': round(seconds * 1000, 3)})
+
+
+@contextmanager
+def recording(recorder):
+    watch_connections()
+    token = _recorders.set(_recorders.get() + (recorder,))
+    try:
+        yield
+    finally:
+        _recorders.reset(token)
+
+
+@asynccontextmanager
+async def arecording(recorder):
+    # Async ORM queries run in the thread sync_to_async hands them to.
+    await sync_to_async(watch_connections)()
+    token = _recorders.set(_recorders.get() + (recorder,))
+    try:
+        yield
+    finally:
+        _recorders.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL query count and time, render time and response size
+    for every request, labelled by URL name, method and status code. Add it
+    near the top of ``MIDDLEWARE`` so its latency covers the rest of the
+    stack; read the results at ``/metrics``. Works under WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        recorder = QueryRecorder()
+        request._metrics_render_seconds = 0.0
+        with recording(recorder):
+            response = self.get_response(request)
+        return self.observe(request, response, time.perf_counter() - started, recorder)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        recorder = QueryRecorder()
+        request._metrics_render_seconds = 0.0
+        async with arecording(recorder):
+            response = await self.get_response(request)
+        return self.observe(request, response, time.perf_counter() - started, recorder)
+
+    def observe(self, request, response, seconds, recorder):
+        match = request.resolver_match
+        view = (match.url_name or match.route) if match else '<unmatched>'
+        labels = (view, request.method, str(response.status_code))
+
+        if response.streaming:
+            size = 0
+            if response.is_async:
+                response.streaming_content = self.acount_bytes(response.streaming_content, labels)
+            else:
+                response.streaming_content = self.count_bytes(response.streaming_content, labels)
+        else:
+            size = len(response.content)
+
+        registry.observe(
+            labels, seconds, recorder.count, recorder.seconds, request._metrics_render_seconds, size
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_render_seconds += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def count_bytes(self, chunks, labels):
+        # Streamed bodies are sent, and usually queried, after the request
+        # itself has been recorded, so they're added to it as they finish.
+        size = 0
+        recorder = QueryRecorder()
+        try:
+            for chunk in self.recorded(chunks, recorder):
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.add_streamed(labels, size, recorder.count, recorder.seconds)
+
+    def recorded(self, chunks, recorder):
+        chunks = iter(chunks)
+        while True:
+            with recording(recorder):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def acount_bytes(self, chunks, labels):
+        size = 0
+        recorder = QueryRecorder()
+        chunks = aiter(chunks)
+        try:
+            while True:
+                async with arecording(recorder):
+                    chunk = await anext(chunks, None)
+                if chunk is None:
+                    return
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.add_streamed(labels, size, recorder.count, recorder.seconds)
+
+
+class ProfilingMiddleware:
+    """
+    Runs cProfile over requests that carry a valid signed ``X-Profile``
+    header (see ``manage.py profiles token``) or that are picked at random
+    at ``PROFILE_SAMPLE_RATE`` (0 to 1, default 0). Each profile is saved
+    with the SQL statements it ran, and its id is returned in the
+    ``X-Profile-Id`` response header; ``manage.py profiles`` lists them.
+
+    Under ASGI the profile covers the event loop thread, so it shows the
+    async code but not the queries' sync_to_async work (those are still
+    listed with their timings), and may include other requests' code
+    that ran in between.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self, request):
+        rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+        return profile_requested(request) or (rate and random.random() < rate)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        recorder = StatementRecorder()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running on this thread.
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            with recording(recorder):
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        seconds = time.perf_counter() - started
+
+        response['X-Profile-Id'] = save_profile(profiler, self.summary(request, response, seconds, recorder))
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled(request):
+            return await self.get_response(request)
+
+        profiler = cProfile.Profile()
+        recorder = StatementRecorder()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request on this event loop is being profiled.
+            return await self.get_response(request)
+        started = time.perf_counter()
+        try:
+            async with arecording(recorder):
+                response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        seconds = time.perf_counter() - started
+
+        summary = self.summary(request, response, seconds, recorder)
+        response['X-Profile-Id'] = await sync_to_async(save_profile)(profiler, summary)
+        return response
+
+    def summary(self, request, response, seconds, recorder):
+        match = request.resolver_match
+        return {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': (match.url_name or match.route) if match else None,
+            'status': response.status_code,
+            'duration_ms': round(seconds * 1000, 3),
+            'query_count': recorder.count,
+            'query_ms': round(recorder.seconds * 1000, 3),
+            'queries': recorder.statements,
+        }
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['timestamp', 'id'], name='task_timestamp_id_idx'),
+        ),
+    ]
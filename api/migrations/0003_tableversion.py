@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+
+def create_task_version(apps, schema_editor):
+    TableVersion = apps.get_model('api', 'TableVersion')
+    TableVersion.objects.get_or_create(name='task')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_task_timestamp_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_task_version, migrations.RunPython.noop),
+    ]
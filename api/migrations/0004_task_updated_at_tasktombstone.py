@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_tableversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at', 'id'], name='task_updated_at_id_idx'),
+        ),
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
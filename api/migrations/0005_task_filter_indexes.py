@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_task_updated_at_tasktombstone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'due_date'], name='task_status_due_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date'], name='task_due_date_idx'),
+        ),
+    ]
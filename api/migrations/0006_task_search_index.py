@@ -0,0 +1,71 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:10
+
+from django.db import migrations
+
+PG_DOCUMENT = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', description), 'B')"
+)
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE api_task_fts USING fts5("
+    "title, description, content='api_task', content_rowid='id')",
+    "CREATE TRIGGER api_task_fts_insert AFTER INSERT ON api_task BEGIN "
+    "INSERT INTO api_task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER api_task_fts_delete AFTER DELETE ON api_task BEGIN "
+    "INSERT INTO api_task_fts(api_task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER api_task_fts_update AFTER UPDATE OF title, description ON api_task BEGIN "
+    "INSERT INTO api_task_fts(api_task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO api_task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "INSERT INTO api_task_fts(api_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS api_task_fts_insert',
+    'DROP TRIGGER IF EXISTS api_task_fts_delete',
+    'DROP TRIGGER IF EXISTS api_task_fts_update',
+    'DROP TABLE IF EXISTS api_task_fts',
+]
+
+POSTGRES_FORWARD = [
+    f'CREATE INDEX api_task_search_idx ON api_task USING GIN (({PG_DOCUMENT}))',
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS api_task_search_idx',
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text index over task title and description.
+
+    SQLite gets an external-content FTS5 table kept in sync by triggers on
+    api_task; PostgreSQL gets a GIN expression index, which it maintains
+    itself. Other backends fall back to unindexed matching.
+
+    Note that SQLite drops the triggers if a later migration has to rebuild
+    api_task; such a migration must recreate them.
+    """
+
+    dependencies = [
+        ('api', '0005_task_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
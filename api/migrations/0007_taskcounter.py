@@ -0,0 +1,47 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:06
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_tasks(apps, schema_editor):
+    Task = apps.get_model('api', 'Task')
+    TaskCounter = apps.get_model('api', 'TaskCounter')
+    counters = [
+        TaskCounter(bucket='status', key=status, count=n)
+        for status, n in Task.objects.order_by().values_list('status').annotate(n=Count('id'))
+    ]
+    due = Task.objects.exclude(due_date=None).order_by().values_list('status', 'due_date')
+    counters += [
+        TaskCounter(bucket='due', key=f'{status}|{due_date}', count=n)
+        for status, due_date, n in due.annotate(n=Count('id'))
+    ]
+    links = Task.tags.through.objects.order_by().values_list('tag_id')
+    counters += [
+        TaskCounter(bucket='tag', key=str(tag_id), count=n)
+        for tag_id, n in links.annotate(n=Count('id'))
+    ]
+    TaskCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_task_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(max_length=10)),
+                ('key', models.CharField(max_length=40)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'key'), name='task_counter_bucket_key_uniq')],
+            },
+        ),
+        migrations.RunPython(count_existing_tasks, migrations.RunPython.noop),
+    ]
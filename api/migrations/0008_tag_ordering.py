@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_taskcounter'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['id']},
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_tag_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(max_length=1000)),
+                ('timestamp', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('WORKING', 'Working'), ('PENDING_REVIEW', 'Pending Review'), ('COMPLETED', 'Completed'), ('OVERDUE', 'Overdue'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('archived_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTaskTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.tag')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.archivedtask')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='archived_tasks', through='api.ArchivedTaskTag', to='api.tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedtasktag',
+            constraint=models.UniqueConstraint(fields=('task', 'tag'), name='archived_task_tag_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['timestamp', 'id'], name='archived_timestamp_id_idx'),
+        ),
+    ]
@@ -1,4 +1,17 @@
-from django.db import models
+from functools import partial
+
+from django.db import connections, models, router, transaction
+
+from .cache import LRUCache
+
+TAG_CACHE_SIZE = 10000
+TAG_CACHE_TTL = 600
+COUNTER_BATCH_SIZE = 300
+
+# Tag name -> id, filled only with committed rows. Renames and deletes only
+# clear it in the process that made them, so resolve_names checks cached
+# ids against the table before handing them out.
+tag_id_cache = LRUCache(maxsize=TAG_CACHE_SIZE, ttl=TAG_CACHE_TTL)
 
 
 
@@ -11,23 +24,231 @@ class Task(models.Model):
         ('OVERDUE', 'Overdue'),
         ('CANCELLED', 'Cancelled'),
     ]
+    ACTIVE_STATUSES = ('OPEN', 'WORKING', 'PENDING_REVIEW')
+    FINISHED_STATUSES = ('COMPLETED', 'CANCELLED')
 
     # Fields
     title = models.CharField(max_length=100)  
     description = models.TextField(max_length=1000)  
     timestamp = models.DateTimeField(auto_now_add=True)  
+    updated_at = models.DateTimeField(auto_now=True)
     due_date = models.DateField(null=True, blank=True) 
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default='OPEN'
     )  
     tags = models.ManyToManyField('Tag', blank=True) 
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='task_timestamp_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='task_updated_at_id_idx'),
+            models.Index(fields=['status', 'due_date'], name='task_status_due_date_idx'),
+            models.Index(fields=['due_date'], name='task_due_date_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in instance.__dict__ and 'due_date' in instance.__dict__:
+            # What TaskCounter currently counts this row as; see api.stats.
+            instance._counted_as = (instance.status, instance.due_date)
+        return instance
+
     def __str__(self):
         return self.title
 
 
+class ArchivedTask(models.Model):
+    """
+    A finished task moved out of ``Task`` by ``archive_tasks``, keeping its
+    id, fields and tags so its history can still be read.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=100)
+    description = models.TextField(max_length=1000)
+    timestamp = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    due_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    archived_at = models.DateTimeField()
+    tags = models.ManyToManyField(
+        'Tag', blank=True, through='ArchivedTaskTag', related_name='archived_tasks'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='archived_timestamp_id_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedTaskTag(models.Model):
+    """
+    An archived task's tag link, with the same ``task_id`` / ``tag_id``
+    columns as ``Task.tags.through``.
+    """
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE)
+    tag = models.ForeignKey('Tag', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'tag'], name='archived_task_tag_uniq'),
+        ]
+
+
+def remember_tag_ids(tag_ids):
+    for name, pk in tag_ids.items():
+        tag_id_cache.set(name, pk)
+
+
+class TaskTombstone(models.Model):
+    """
+    Records a deleted task so sync clients can learn about the deletion.
+    """
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+
+class TagManager(models.Manager):
+    def resolve_names(self, names):
+        """
+        Map tag names to ids. Ids from ``tag_id_cache`` are confirmed in one
+        query by primary key, the rest are looked up in one query by name,
+        and any still missing are created in a single upsert.
+        """
+        names = set(names)
+        cached = {}
+        for name in names:
+            pk = tag_id_cache.get(name)
+            if pk is not None:
+                cached[name] = pk
+
+        tag_ids = {}
+        if cached:
+            # Another worker may have renamed or deleted a cached tag; its
+            # name is then resolved afresh below.
+            current = set(
+                self.filter(pk__in=cached.values(), name__in=cached).order_by().values_list('name', 'id')
+            )
+            for name, pk in cached.items():
+                if (name, pk) in current:
+                    tag_ids[name] = pk
+                else:
+                    tag_id_cache.delete(name)
+
+        missing = names - tag_ids.keys()
+        if missing:
+            found = dict(self.filter(name__in=missing).values_list('name', 'id'))
+            unknown = missing - found.keys()
+            if unknown:
+                self.bulk_create([Tag(name=name) for name in unknown], ignore_conflicts=True)
+                found.update(self.filter(name__in=unknown).values_list('name', 'id'))
+            # Don't cache ids a rollback could still take back.
+            transaction.on_commit(partial(remember_tag_ids, found))
+            tag_ids.update(found)
+        return tag_ids
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True) 
 
+    objects = TagManager()
+
+    class Meta:
+        ordering = ['id']
+
     def __str__(self):
         return self.name
+
+
+class TableVersion(models.Model):
+    """
+    A change counter per table, bumped on every write so responses can be
+    versioned without reading the rows themselves.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    @classmethod
+    def current(cls, *names):
+        versions = dict(cls.objects.filter(name__in=names).values_list('name', 'version'))
+        return tuple(versions.get(name, 0) for name in names)
+
+    @classmethod
+    async def acurrent(cls, *names):
+        versions = {
+            name: version
+            async for name, version in cls.objects.filter(name__in=names).values_list('name', 'version')
+        }
+        return tuple(versions.get(name, 0) for name in names)
+
+    @classmethod
+    def bump(cls, name):
+        if cls.objects.filter(name=name).update(version=models.F('version') + 1):
+            return
+        _, created = cls.objects.get_or_create(name=name, defaults={'version': 1})
+        if not created:
+            cls.objects.filter(name=name).update(version=models.F('version') + 1)
+
+
+class TaskCounterManager(models.Manager):
+    def apply(self, deltas):
+        """
+        Add each ``(bucket, key) -> delta`` in ``deltas`` to its counter,
+        creating missing counters, with one upsert per
+        ``COUNTER_BATCH_SIZE`` keys however many distinct keys there are.
+        Counters brought down to zero are deleted, so the ``due`` rows don't
+        pile up for every date that was ever used.
+        """
+        rows = sorted((bucket, key, delta) for (bucket, key), delta in deltas.items() if delta)
+        if not rows:
+            return
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        bucket, key, count = quote('bucket'), quote('key'), quote('count')
+        if connection.vendor == 'mysql':
+            conflict = f'ON DUPLICATE KEY UPDATE {count} = {count} + VALUES({count})'
+        else:
+            conflict = (
+                f'ON CONFLICT ({bucket}, {key}) '
+                f'DO UPDATE SET {count} = {table}.{count} + excluded.{count}'
+            )
+        # Keys go in sorted so concurrent writers lock rows in the same order.
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), COUNTER_BATCH_SIZE):
+                batch = rows[start:start + COUNTER_BATCH_SIZE]
+                values = ', '.join(['(%s, %s, %s)'] * len(batch))
+                cursor.execute(
+                    f'INSERT INTO {table} ({bucket}, {key}, {count}) VALUES {values} {conflict}',
+                    [value for row in batch for value in row],
+                )
+                lowered = [(row_bucket, row_key) for row_bucket, row_key, delta in batch if delta < 0]
+                if lowered:
+                    keys = ', '.join(['(%s, %s)'] * len(lowered))
+                    cursor.execute(
+                        f'DELETE FROM {table} WHERE {count} = 0 AND ({bucket}, {key}) IN ({keys})',
+                        [value for row in lowered for value in row],
+                    )
+
+
+class TaskCounter(models.Model):
+    """
+    Precomputed task counts, kept up to date on every write.
+
+    ``bucket`` is ``status`` (keyed by status), ``tag`` (keyed by tag id) or
+    ``due`` (keyed by ``STATUS|YYYY-MM-DD``, from which overdue counts are
+    derived as dates pass).
+    """
+    bucket = models.CharField(max_length=10)
+    key = models.CharField(max_length=40)
+    count = models.BigIntegerField(default=0)
+
+    objects = TaskCounterManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'key'], name='task_counter_bucket_key_uniq'),
+        ]
@@ -0,0 +1,96 @@
+import json
+
+from django.db import transaction
+
+from .payloads import PAYLOAD_FIELDS, row_fields, task_payloads
+from .renderers import json_bytes
+from .serializers import TaskSerializer, bulk_create_tasks
+
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_tasks(queryset, chunk_size=None, fields=PAYLOAD_FIELDS):
+    """
+    Yield the tasks in ``queryset`` as newline-delimited JSON, reading rows
+    through a server-side iterator and loading tags once per chunk, so memory
+    use is bounded by ``chunk_size`` rather than by the table size. Only the
+    columns ``fields`` needs are read.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    rows = queryset.order_by('id').values(*row_fields(fields)).iterator(chunk_size=chunk_size)
+    for chunk in chunked(rows, chunk_size):
+        yield b''.join(json_bytes(task) + b'\n' for task in task_payloads(chunk, fields=fields))
+
+
+def import_tasks(lines, batch_size=None, on_batch=None, on_error=None):
+    """
+    Validate NDJSON task records one line at a time with ``TaskSerializer``
+    and insert the valid ones in batches of ``batch_size``, each batch in its
+    own transaction.
+
+    Returns a report of how many tasks were imported and how many lines
+    failed, with the first ``MAX_REPORTED_ERRORS`` errors. ``on_batch`` is
+    called with the report after every committed batch and ``on_error``
+    with each failed line's error, so callers can follow progress without
+    the report growing with the input.
+    """
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+
+    def fail(number, errors):
+        error = {'line': number, 'errors': errors}
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append(error)
+        if on_error:
+            on_error(error)
+
+    def flush(batch):
+        with transaction.atomic():
+            bulk_create_tasks(batch)
+        report['imported'] += len(batch)
+        if on_batch:
+            on_batch(report)
+
+    batch = []
+    for number, line in enumerate(lines, start=1):
+        try:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+        except ValueError as exc:
+            fail(number, {'non_field_errors': [f'Invalid JSON: {exc}']})
+            continue
+        if not isinstance(record, dict):
+            fail(number, {'non_field_errors': ['Expected an object']})
+            continue
+
+        serializer = TaskSerializer(data=record)
+        if not serializer.is_valid():
+            fail(number, serializer.errors)
+            continue
+
+        batch.append(serializer.validated_data)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+
+    if batch:
+        flush(batch)
+    return report
@@ -0,0 +1,43 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_tasks
+from .models import Task, TaskCounter
+from .stats import task_deltas
+
+OVERDUE_CHUNK_SIZE = 1000
+
+
+def mark_overdue(today=None, chunk_size=None):
+    """
+    Move every unfinished task due before ``today`` to OVERDUE, one
+    ``UPDATE`` per chunk of at most ``chunk_size`` rows, and return how many
+    were moved.
+
+    Candidates are found through the ``(status, due_date)`` index; each chunk
+    is locked, updated and counted in its own transaction so a long sweep
+    never holds locks on the whole backlog.
+    """
+    today = today or timezone.localdate()
+    chunk_size = chunk_size or OVERDUE_CHUNK_SIZE
+    pending = Task.objects.filter(status__in=Task.ACTIVE_STATUSES, due_date__lt=today).order_by()
+    touched = 0
+    while True:
+        with transaction.atomic():
+            rows = list(pending.select_for_update().values_list('pk', 'status', 'due_date')[:chunk_size])
+            if not rows:
+                return touched
+            pks = [pk for pk, _, _ in rows]
+            Task.objects.filter(pk__in=pks).update(status='OVERDUE', updated_at=timezone.now())
+
+            # update() skips the model signals.
+            deltas = Counter()
+            for _, status, due_date in rows:
+                deltas.update(task_deltas((status, due_date), ('OVERDUE', due_date)))
+            TaskCounter.objects.apply(deltas)
+            invalidate_tasks(pks)
+        touched += len(rows)
+        if len(rows) < chunk_size:
+            return touched
@@ -0,0 +1,110 @@
+import base64
+import heapq
+from itertools import islice
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, pk):
+    raw = f'{timestamp.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        parsed = parse_datetime(timestamp)
+        if parsed is None:
+            raise ValueError(timestamp)
+        return parsed, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise PaginationError('Invalid cursor')
+
+
+def parse_limit(value):
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError('Invalid limit')
+    if limit < 1:
+        raise PaginationError('Invalid limit')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _page(queryset, params):
+    limit = parse_limit(params.get('limit'))
+    cursor = params.get('cursor')
+
+    queryset = queryset.order_by('timestamp', 'id')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)
+        )
+    return queryset[:limit + 1], limit
+
+
+def _finish_page(tasks, limit):
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        last = tasks[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last['timestamp'], last['id'])
+        else:
+            next_cursor = encode_cursor(last.timestamp, last.pk)
+    return tasks, next_cursor
+
+
+def paginate_tasks(queryset, params):
+    """
+    Keyset pagination over ``(timestamp, id)``.
+
+    Returns ``(tasks, next_cursor)``. Each page is a single indexed range
+    scan, so its cost does not depend on how deep the client has paged.
+    ``queryset`` may also be a ``values()`` queryset, giving dict rows.
+    """
+    queryset, limit = _page(queryset, params)
+    return _finish_page(list(queryset), limit)
+
+
+def paginate_merged(querysets, params):
+    """
+    ``paginate_tasks`` over several ``values()`` querysets that share no
+    ids, such as hot and archived tasks. Each is paged with its own range
+    scan and the pages are merged, so cursors work across all of them.
+    """
+    pages = []
+    for queryset in querysets:
+        queryset, limit = _page(queryset, params)
+        pages.append(list(queryset))
+    return _merge_pages(pages, limit)
+
+
+def _merge_pages(pages, limit):
+    rows = heapq.merge(*pages, key=lambda row: (row['timestamp'], row['id']))
+    return _finish_page(list(islice(rows, limit + 1)), limit)
+
+
+async def apaginate_tasks(queryset, params):
+    queryset, limit = _page(queryset, params)
+    return _finish_page([task async for task in queryset], limit)
+
+
+async def apaginate_merged(querysets, params):
+    pages = []
+    for queryset in querysets:
+        queryset, limit = _page(queryset, params)
+        pages.append([row async for row in queryset])
+    return _merge_pages(pages, limit)
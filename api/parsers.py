@@ -0,0 +1,25 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.settings import api_settings
+
+from .renderers import msgpack
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses ``application/msgpack`` request bodies into the same structures a
+    JSON body would give.
+    """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
+
+
+# MessagePack is only accepted when the msgpack package is installed.
+API_PARSER_CLASSES = list(api_settings.DEFAULT_PARSER_CLASSES) + (
+    [MessagePackParser] if msgpack is not None else []
+)
@@ -0,0 +1,106 @@
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from .models import Task
+
+# TaskSerializer's fields, in its order, minus ``tags``.
+TASK_FIELDS = ('id', 'title', 'description', 'timestamp', 'due_date', 'status')
+PAYLOAD_FIELDS = TASK_FIELDS + ('tags',)
+
+_datetime = serializers.DateTimeField().to_representation
+_date = serializers.DateField().to_representation
+
+
+def _tag_links(model, pks):
+    links = model.tags.through.objects.filter(task_id__in=pks).order_by('task_id', 'tag_id')
+    return links.values_list('task_id', 'tag_id', 'tag__name')
+
+
+def tag_map(pks, sources=(Task,)):
+    """
+    ``{task pk: [tag dicts]}`` for ``pks`` in one query per model in
+    ``sources``, each list ordered by tag id like ``Tag``'s default ordering.
+    """
+    tags = defaultdict(list)
+    for model in sources:
+        for task_id, tag_id, name in _tag_links(model, pks):
+            tags[task_id].append({'id': tag_id, 'name': name})
+    return tags
+
+
+async def atag_map(pks, sources=(Task,)):
+    tags = defaultdict(list)
+    for model in sources:
+        async for task_id, tag_id, name in _tag_links(model, pks):
+            tags[task_id].append({'id': tag_id, 'name': name})
+    return tags
+
+
+def row_fields(fields, *required):
+    """
+    The ``values()`` columns needed to build payloads with ``fields``, plus
+    ``required`` ones such as the pagination key. Tags need the id.
+    """
+    wanted = set(required) | {field for field in fields if field != 'tags'}
+    if 'tags' in fields:
+        wanted.add('id')
+    return [field for field in TASK_FIELDS if field in wanted]
+
+
+def task_payloads(rows, sources=(Task,), fields=PAYLOAD_FIELDS):
+    """
+    Turn ``Task.objects.values(*TASK_FIELDS)`` rows into the dicts
+    ``TaskSerializer`` would produce for the same tasks, without going
+    through its field machinery. Tags are loaded with a single query per
+    model in ``sources``, which lists ``ArchivedTask`` for archived rows.
+
+    With a subset of ``PAYLOAD_FIELDS`` in ``fields`` only those keys are
+    produced, the rows need only the ``row_fields(fields)`` columns, and tags
+    are not loaded at all unless asked for.
+    """
+    rows = list(rows)
+    tags = tag_map([row['id'] for row in rows], sources) if 'tags' in fields else {}
+    return _build_payloads(rows, tags, fields)
+
+
+async def atask_payloads(rows, sources=(Task,), fields=PAYLOAD_FIELDS):
+    """
+    ``task_payloads`` for rows already read through the async ORM, loading
+    tags the same way.
+    """
+    tags = await atag_map([row['id'] for row in rows], sources) if 'tags' in fields else {}
+    return _build_payloads(rows, tags, fields)
+
+
+def _build_payloads(rows, tags, fields):
+    if fields != PAYLOAD_FIELDS:
+        return _sparse_payloads(rows, tags, fields)
+    return [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'timestamp': _datetime(row['timestamp']),
+            'due_date': _date(row['due_date']),
+            'status': row['status'],
+            'tags': tags.get(row['id'], []),
+        }
+        for row in rows
+    ]
+
+
+def _sparse_payloads(rows, tags, fields):
+    convert = {'timestamp': _datetime, 'due_date': _date}
+    payloads = []
+    for row in rows:
+        payload = {}
+        for field in fields:
+            if field == 'tags':
+                payload['tags'] = tags.get(row['id'], [])
+            elif field in convert:
+                payload[field] = convert[field](row[field])
+            else:
+                payload[field] = row[field]
+        payloads.append(payload)
+    return payloads
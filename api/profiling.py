@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_SALT = 'api.profiling'
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+PROFILE_MAX_FILES = 100
+PROFILE_MAX_STATEMENTS = 500
+PROFILE_TOP_FUNCTIONS = 20
+
+
+def profile_dir():
+    directory = getattr(settings, 'PROFILE_DIR', None) or os.path.join(tempfile.gettempdir(), 'todo-profiles')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def issue_profile_token():
+    """
+    A value for the ``X-Profile`` header that asks for one request to be
+    profiled, valid for ``PROFILE_TOKEN_MAX_AGE`` seconds.
+    """
+    return signing.dumps('profile', salt=PROFILE_SALT)
+
+
+def profile_requested(request):
+    token = request.META.get(PROFILE_HEADER)
+    if not token:
+        return False
+    try:
+        return signing.loads(token, salt=PROFILE_SALT, max_age=PROFILE_TOKEN_MAX_AGE) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+def top_functions(stats, limit=PROFILE_TOP_FUNCTIONS):
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': f'{filename}:{line}({name})',
+            'calls': calls,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, own, cumulative, _) in rows
+    ]
+
+
+def save_profile(profiler, summary):
+    """
+    Write ``profiler``'s stats and ``summary`` to the profile directory,
+    dropping the oldest profiles beyond ``PROFILE_MAX_FILES``. Returns the
+    profile's id.
+    """
+    directory = profile_dir()
+    now = time.time_ns()
+    # Sortable by capture time, so the ring drops the oldest first.
+    stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(now // 10 ** 9))
+    profile_id = f'{stamp}.{now % 10 ** 9:09d}-{uuid.uuid4().hex[:6]}'
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+    summary = {'id': profile_id, **summary, 'top_functions': top_functions(stats)}
+    with open(os.path.join(directory, f'{profile_id}.json'), 'w') as target:
+        json.dump(summary, target, indent=2)
+
+    limit = getattr(settings, 'PROFILE_MAX_FILES', PROFILE_MAX_FILES)
+    for old in list_profile_ids()[:-limit]:
+        for suffix in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(directory, old + suffix))
+            except FileNotFoundError:
+                pass
+    return profile_id
+
+
+def list_profile_ids():
+    """
+    Saved profile ids, oldest first.
+    """
+    return sorted(name[:-5] for name in os.listdir(profile_dir()) if name.endswith('.json'))
+
+
+def load_summary(profile_id):
+    with open(os.path.join(profile_dir(), f'{profile_id}.json')) as source:
+        return json.load(source)
+
+
+def format_stats(profile_id, limit=PROFILE_TOP_FUNCTIONS, sort='cumulative'):
+    output = io.StringIO()
+    stats = pstats.Stats(os.path.join(profile_dir(), f'{profile_id}.prof'), stream=output)
+    stats.sort_stats(sort).print_stats(limit)
+    return output.getvalue()
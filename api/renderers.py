@@ -0,0 +1,83 @@
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+# Options that make orjson's output match ``json.dumps(...,
+# ensure_ascii=False, separators=(',', ':'))``: datetimes and dataclasses
+# are handed to DRF's encoder instead of being formatted by orjson.
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+
+
+def json_bytes(payload, default=None):
+    """
+    Compact UTF-8 JSON for ``payload``: orjson when it's installed and can
+    encode it, otherwise the standard library.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=default)
+    return encoder.encode(payload).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that produces the same bytes through ``json_bytes``
+    whenever the response is compact, unindented and allowed to be UTF-8,
+    which is the default configuration.
+
+    The one difference is in floats written with an exponent (orjson writes
+    ``1e20`` where the standard library writes ``1e+20``); task payloads
+    contain no floats.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = json_bytes(data, default=self.encoder_class().default)
+        # Escaped like JSONRenderer, to stay a strict JavaScript subset.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders ``application/msgpack`` for clients that ask for it in
+    ``Accept``. Values MessagePack has no type for (dates, lazy strings)
+    become the same strings JSON responses use.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=JSONRenderer.encoder_class().default)
+
+
+# The configured renderers, with the JSON one swapped for FastJSONRenderer.
+FAST_RENDERER_CLASSES = [
+    FastJSONRenderer if renderer is JSONRenderer else renderer
+    for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+]
+
+# MessagePack is only offered when the msgpack package is installed.
+API_RENDERER_CLASSES = FAST_RENDERER_CLASSES + ([MessagePackRenderer] if msgpack is not None else [])
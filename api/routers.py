@@ -0,0 +1,175 @@
+import random
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .cache import LRUCache
+
+REPLICA_STICKY_SECONDS = 5
+REPLICA_RETRY_SECONDS = 30
+
+# The replica alias reads go to for the current request, or None for the
+# primary. A ContextVar, so threads and async tasks each get their own.
+_read_alias = ContextVar('api_read_alias', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', REPLICA_STICKY_SECONDS)
+
+
+def read_alias():
+    return _read_alias.get()
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica a view picked with ``use_replica`` and every
+    other query, including all writes, to the primary. Replicas are copies
+    of the primary, so they are never migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class PrimaryPins:
+    """
+    Users who wrote within the last ``REPLICA_STICKY_SECONDS`` and so must
+    read from the primary until the replicas have caught up.
+
+    Pins live in a process-local LRU unless ``TASK_CACHE_ALIAS`` names one of
+    Django's caches, in which case every worker sees them.
+    """
+    key_prefix = 'api:pin:'
+
+    def __init__(self, maxsize=4096):
+        self._local = LRUCache(maxsize=maxsize)
+
+    @property
+    def backend(self):
+        alias = getattr(settings, 'TASK_CACHE_ALIAS', None)
+        return caches[alias] if alias else self._local
+
+    def pin(self, user):
+        self.backend.set(f'{self.key_prefix}{user.pk}', True, sticky_seconds())
+
+    def is_pinned(self, user):
+        return bool(self.backend.get(f'{self.key_prefix}{user.pk}'))
+
+    def clear(self):
+        self._local.clear()
+
+
+primary_pins = PrimaryPins()
+
+
+class ReplicaHealth:
+    """
+    Replicas that failed to connect, skipped for ``REPLICA_RETRY_SECONDS``.
+    """
+
+    def __init__(self):
+        self._down = {}
+        self._lock = threading.Lock()
+
+    def healthy(self, aliases):
+        now = time.monotonic()
+        with self._lock:
+            return [alias for alias in aliases if self._down.get(alias, 0) <= now]
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._down[alias] = time.monotonic() + REPLICA_RETRY_SECONDS
+
+    def clear(self):
+        with self._lock:
+            self._down.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def choose_replica(user=None):
+    """
+    A connected replica alias for ``user``'s reads, or ``None`` when they
+    should go to the primary: no replica is configured or reachable, or the
+    user wrote within the sticky window.
+    """
+    if user is not None and user.is_authenticated and primary_pins.is_pinned(user):
+        return None
+    candidates = replica_health.healthy(replica_aliases())
+    random.shuffle(candidates)
+    for alias in candidates:
+        try:
+            # Reuses the persistent connection; with CONN_HEALTH_CHECKS a
+            # dead one is replaced at the start of the request.
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            replica_health.mark_down(alias)
+            continue
+        return alias
+    return None
+
+
+def use_replica(user=None):
+    """
+    Route this context's reads to a replica chosen for ``user``. Returns a
+    token for ``release_replica``.
+    """
+    return _read_alias.set(choose_replica(user))
+
+
+def release_replica(token):
+    _read_alias.reset(token)
+
+
+def sync_sqlite_replicas(aliases=None):
+    """
+    Overwrite each SQLite replica's file with a consistent snapshot of the
+    SQLite primary, so file copies can stand in for real replicas locally.
+    Returns the aliases copied.
+    """
+    primary = connections[DEFAULT_DB_ALIAS]
+    aliases = replica_aliases() if aliases is None else aliases
+    for alias in [DEFAULT_DB_ALIAS, *aliases]:
+        if connections[alias].vendor != 'sqlite':
+            raise ValueError(f'Database "{alias}" is not SQLite.')
+
+    if primary.in_atomic_block:
+        # The backup would wait forever on our own uncommitted writes.
+        raise ValueError('The primary can not be copied from inside a transaction.')
+
+    primary.ensure_connection()
+    for alias in aliases:
+        replica = connections[alias]
+        # Drop our own handle first so the copy isn't blocked by it.
+        replica.close()
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+    return aliases
@@ -0,0 +1,93 @@
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Task
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+MAX_SEARCH_OFFSET = 1000
+
+# Must match the expression the GIN index in migration 0006 was built on.
+PG_DOCUMENT = (
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', description), 'B')"
+)
+
+_TERM = re.compile(r'\w+')
+
+
+class SearchError(ValueError):
+    pass
+
+
+def _bounded(value, default, low, high, name):
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise SearchError(f'Invalid {name}')
+    if not low <= value <= high:
+        raise SearchError(f'{name} must be between {low} and {high}')
+    return value
+
+
+def _sqlite_has_fts(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'api_task_fts'")
+        return cursor.fetchone() is not None
+
+
+def search_task_ids(terms, limit, offset):
+    """
+    Ids of tasks matching every term (the last one as a prefix), best match
+    first, with title matches weighted above description matches.
+    """
+    # The database the rows will be loaded from, so a replica's results
+    # aren't matched against the primary.
+    connection = connections[router.db_for_read(Task)]
+    if connection.vendor == 'sqlite' and _sqlite_has_fts(connection):
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        sql = (
+            'SELECT rowid FROM api_task_fts WHERE api_task_fts MATCH %s '
+            'ORDER BY bm25(api_task_fts, 10.0, 1.0), rowid LIMIT %s OFFSET %s'
+        )
+        params = [match, limit, offset]
+    elif connection.vendor == 'postgresql':
+        query = "to_tsquery('english', %s)"
+        sql = (
+            f'SELECT id FROM api_task WHERE ({PG_DOCUMENT}) @@ {query} '
+            f'ORDER BY ts_rank(({PG_DOCUMENT}), {query}) DESC, id LIMIT %s OFFSET %s'
+        )
+        tsquery = ' & '.join(terms) + ':*'
+        params = [tsquery, tsquery, limit, offset]
+    else:
+        tasks = Task.objects.all()
+        for term in terms:
+            tasks = tasks.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        return list(tasks.order_by('id').values_list('id', flat=True)[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_tasks(params):
+    """
+    Returns ``(tasks, next_offset)`` for the ``q``, ``limit`` and ``offset``
+    query parameters.
+    """
+    terms = _TERM.findall(params.get('q', ''))
+    if not terms:
+        raise SearchError('Search query is required')
+    limit = _bounded(params.get('limit'), SEARCH_PAGE_SIZE, 1, MAX_SEARCH_PAGE_SIZE, 'limit')
+    offset = _bounded(params.get('offset'), 0, 0, MAX_SEARCH_OFFSET, 'offset')
+
+    ids = search_task_ids(terms, limit + 1, offset)
+    next_offset = offset + limit if len(ids) > limit else None
+    ids = ids[:limit]
+
+    tasks = Task.objects.prefetch_related('tags').in_bulk(ids)
+    return [tasks[pk] for pk in ids if pk in tasks], next_offset
@@ -1,11 +1,142 @@
+import operator
+from collections import Counter, defaultdict
+from functools import reduce
+
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Task, Tag
+from .cache import invalidate_tasks
+from .models import Task, TaskCounter, Tag
+from .stats import tag_deltas, task_deltas
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'name']
         read_only_fields = ['id']
+        # Tags are resolved by name on write, so an existing name is not an error.
+        extra_kwargs = {'name': {'validators': []}}
+
+
+def bulk_create_tasks(validated_data):
+    """
+    Insert tasks, their tags and the tag links in a constant number of queries.
+    """
+    tasks, tag_names = [], []
+    for item in validated_data:
+        item = dict(item)
+        tag_names.append(list(dict.fromkeys(tag['name'] for tag in item.pop('tags', []))))
+        tasks.append(Task(**item))
+
+    tasks = Task.objects.bulk_create(tasks)
+    tag_ids = Tag.objects.resolve_names(name for names in tag_names for name in names)
+
+    Through = Task.tags.through
+    links = Through.objects.bulk_create([
+        Through(task_id=task.pk, tag_id=tag_ids[name])
+        for task, names in zip(tasks, tag_names)
+        for name in names
+    ])
+
+    # bulk_create skips the model signals.
+    deltas = tag_deltas(link.tag_id for link in links)
+    for task in tasks:
+        deltas.update(task_deltas(None, (task.status, task.due_date)))
+        task._counted_as = (task.status, task.due_date)
+    TaskCounter.objects.apply(deltas)
+    invalidate_tasks(task.pk for task in tasks)
+    return tasks
+
+
+def apply_changes(task, data):
+    """
+    Set the values in ``data`` that differ from ``task``'s own and return
+    the names of those fields.
+    """
+    changed = []
+    for field, value in data.items():
+        if getattr(task, field) != value:
+            setattr(task, field, value)
+            changed.append(field)
+    return changed
+
+
+def tag_link_changes(wanted):
+    """
+    Diff ``{task pk: set of tag ids}`` against the stored links and return
+    ``(added, removed)`` lists of ``(task pk, tag id)`` pairs.
+    """
+    current = defaultdict(set)
+    links = Task.tags.through.objects.filter(task_id__in=wanted).values_list('task_id', 'tag_id')
+    for task_id, tag_id in links:
+        current[task_id].add(tag_id)
+    added, removed = [], []
+    for pk, tag_ids in wanted.items():
+        added += [(pk, tag_id) for tag_id in sorted(tag_ids - current[pk])]
+        removed += [(pk, tag_id) for tag_id in sorted(current[pk] - tag_ids)]
+    return added, removed
+
+
+def bulk_update_tasks(updates):
+    """
+    Apply ``(task, validated_data)`` partial updates, writing only the
+    columns that changed with one ``bulk_update`` per distinct set of them,
+    and inserting and deleting only the tag links that changed.
+    """
+    changed = {}
+    tag_names = {}
+    for task, data in updates:
+        data = dict(data)
+        tags_data = data.pop('tags', [])
+        if tags_data:
+            tag_names[task.pk] = list(dict.fromkeys(tag['name'] for tag in tags_data))
+        changed.setdefault(task.pk, (task, set()))[1].update(apply_changes(task, data))
+
+    added, removed = [], []
+    if tag_names:
+        tag_ids = Tag.objects.resolve_names(
+            name for names in tag_names.values() for name in names
+        )
+        added, removed = tag_link_changes({
+            pk: {tag_ids[name] for name in names} for pk, names in tag_names.items()
+        })
+    retagged = {pk for pk, _ in added + removed}
+
+    now = timezone.now()
+    groups = defaultdict(list)
+    deltas = Counter()
+    for pk, (task, fields) in changed.items():
+        if fields or pk in retagged:
+            # bulk_update doesn't apply auto_now, so stamp the row ourselves.
+            task.updated_at = now
+            groups[frozenset(fields) | {'updated_at'}].append(task)
+            deltas.update(task_deltas(task._counted_as, (task.status, task.due_date)))
+            task._counted_as = (task.status, task.due_date)
+
+    for fields, tasks in groups.items():
+        Task.objects.bulk_update(tasks, sorted(fields))
+
+    Through = Task.tags.through
+    if removed:
+        by_task = defaultdict(list)
+        for pk, tag_id in removed:
+            by_task[pk].append(tag_id)
+        Through.objects.filter(reduce(operator.or_, (
+            Q(task_id=pk, tag_id__in=tag_ids) for pk, tag_ids in by_task.items()
+        ))).delete()
+        deltas.update(tag_deltas((tag_id for _, tag_id in removed), -1))
+    if added:
+        Through.objects.bulk_create([Through(task_id=pk, tag_id=tag_id) for pk, tag_id in added])
+        deltas.update(tag_deltas(tag_id for _, tag_id in added))
+
+    # bulk_update and through-table writes bypass the model signals.
+    TaskCounter.objects.apply(deltas)
+    invalidate_tasks(pk for pk, (task, fields) in changed.items() if fields or pk in retagged)
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        return bulk_create_tasks(validated_data)
 
 class TaskSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, required=False) 
@@ -14,27 +145,34 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = ['id', 'title', 'description', 'timestamp', 'due_date', 'status', 'tags']
         read_only_fields = ['id', 'timestamp']
+        list_serializer_class = TaskListSerializer
 
     def create(self, validated_data):
         tags_data = validated_data.pop('tags', [])
         task = Task.objects.create(**validated_data)
-        for tag_data in tags_data:
-            tag, created = Tag.objects.get_or_create(name=tag_data['name'])
-            task.tags.add(tag)
+        if tags_data:
+            # Written directly rather than with tags.add(), whose signal
+            # would stamp updated_at and invalidate the row just inserted.
+            Through = Task.tags.through
+            links = Through.objects.bulk_create([
+                Through(task_id=task.pk, tag_id=tag_id)
+                for tag_id in Tag.objects.resolve_names(tag['name'] for tag in tags_data).values()
+            ])
+            TaskCounter.objects.apply(tag_deltas(link.tag_id for link in links))
         return task
 
     def update(self, instance, validated_data):
         tags_data = validated_data.pop('tags', [])
-        instance.title = validated_data.get('title', instance.title)
-        instance.description = validated_data.get('description', instance.description)
-        instance.due_date = validated_data.get('due_date', instance.due_date)
-        instance.status = validated_data.get('status', instance.status)
-        instance.save()
+        changed = apply_changes(instance, validated_data)
+        if changed:
+            instance.save(update_fields=changed + ['updated_at'])
 
         if tags_data:
-            instance.tags.clear()
-            for tag_data in tags_data:
-                tag, created = Tag.objects.get_or_create(name=tag_data['name'])
-                instance.tags.add(tag)
+            wanted = set(Tag.objects.resolve_names(tag['name'] for tag in tags_data).values())
+            current = {tag.pk for tag in instance.tags.all()}
+            if current - wanted:
+                instance.tags.remove(*(current - wanted))
+            if wanted - current:
+                instance.tags.add(*(wanted - current))
 
         return instance
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import invalidate_user
+from .cache import invalidate_tasks
+from .models import Tag, Task, TaskCounter, TaskTombstone, tag_id_cache
+from .stats import tag_deltas, task_deltas
+
+
+def tags_changed(pks):
+    """
+    Tag links or names changed for ``pks``: the rows themselves weren't saved,
+    so bump their ``updated_at`` for sync clients and drop cached payloads.
+    """
+    pks = list(pks)
+    if pks:
+        Task.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+        invalidate_tasks(pks)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_user_credentials(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Task)
+def invalidate_task(sender, instance, **kwargs):
+    invalidate_tasks([instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def record_tombstone(sender, instance, **kwargs):
+    TaskTombstone.objects.create(task_id=instance.pk)
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def task_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # clear() doesn't report pk_set, so collect the tag's tasks beforehand.
+        tags_changed(instance.task_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        tags_changed((pk_set or []) if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        tags_changed(instance.task_set.values_list('pk', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def forget_tag_id(sender, instance, **kwargs):
+    tag_id_cache.delete_where(lambda pk: pk == instance.pk)
+
+
+@receiver(pre_save, sender=Task)
+def load_counted_state(sender, instance, **kwargs):
+    if not instance._state.adding and not hasattr(instance, '_counted_as'):
+        instance._counted_as = Task.objects.filter(pk=instance.pk).values_list(
+            'status', 'due_date'
+        ).first()
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, **kwargs):
+    after = (instance.status, instance.due_date)
+    before = None if created else instance._counted_as
+    TaskCounter.objects.apply(task_deltas(before, after))
+    instance._counted_as = after
+
+
+@receiver(post_delete, sender=Task)
+def count_deleted_task(sender, instance, **kwargs):
+    before = getattr(instance, '_counted_as', (instance.status, instance.due_date))
+    TaskCounter.objects.apply(task_deltas(before, None))
+
+
+@receiver(m2m_changed, sender=Task.tags.through)
+def count_tag_links(sender, instance, action, reverse, pk_set, **kwargs):
+    # Django sends no delete signals for auto-created through rows, so removed
+    # links are counted here before they go. post_add only reports new links.
+    Through = Task.tags.through
+    if action == 'post_add' and pk_set:
+        tag_ids = [instance.pk] * len(pk_set) if reverse else pk_set
+        TaskCounter.objects.apply(tag_deltas(tag_ids))
+    elif action in ('pre_remove', 'pre_clear'):
+        links = Through.objects.filter(**{'tag_id' if reverse else 'task_id': instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{'task_id__in' if reverse else 'tag_id__in': pk_set})
+        TaskCounter.objects.apply(tag_deltas(links.values_list('tag_id', flat=True), -1))
+
+
+@receiver(pre_delete, sender=Task)
+def count_deleted_task_tags(sender, instance, **kwargs):
+    TaskCounter.objects.apply(tag_deltas(instance.tags.values_list('pk', flat=True), -1))
+
+
+@receiver(post_delete, sender=Tag)
+def drop_tag_counter(sender, instance, **kwargs):
+    TaskCounter.objects.filter(bucket='tag', key=str(instance.pk)).delete()
@@ -0,0 +1,123 @@
+import operator
+from collections import Counter
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Tag, Task, TaskCounter
+
+
+def counter_keys(status, due_date):
+    keys = [('status', status)]
+    if due_date:
+        # str() so an unsaved ISO string and a loaded date give the same key.
+        keys.append(('due', f'{status}|{due_date}'))
+    return keys
+
+
+def task_deltas(before, after):
+    """
+    Counter changes for one task going from ``before`` to ``after``, each a
+    ``(status, due_date)`` pair or ``None`` for "doesn't exist".
+    """
+    deltas = Counter()
+    if before:
+        for key in counter_keys(*before):
+            deltas[key] -= 1
+    if after:
+        for key in counter_keys(*after):
+            deltas[key] += 1
+    return deltas
+
+
+def tag_deltas(tag_ids, delta=1):
+    deltas = Counter()
+    for tag_id in tag_ids:
+        deltas[('tag', str(tag_id))] += delta
+    return deltas
+
+
+def actual_counts():
+    """
+    Recompute every counter from the tables with GROUP BY queries.
+    """
+    counts = Counter()
+    for status, n in Task.objects.order_by().values_list('status').annotate(n=Count('id')):
+        counts[('status', status)] = n
+    due = Task.objects.exclude(due_date=None).order_by().values_list('status', 'due_date')
+    for status, due_date, n in due.annotate(n=Count('id')):
+        counts[('due', f'{status}|{due_date}')] = n
+    links = Task.tags.through.objects.order_by().values_list('tag_id')
+    for tag_id, n in links.annotate(n=Count('id')):
+        counts[('tag', str(tag_id))] = n
+    return counts
+
+
+def stored_counts():
+    return Counter({
+        (bucket, key): count
+        for bucket, key, count in TaskCounter.objects.values_list('bucket', 'key', 'count')
+        if count
+    })
+
+
+def counter_drift():
+    """
+    ``{(bucket, key): (stored, actual)}`` for every counter that's wrong.
+    """
+    stored, actual = stored_counts(), actual_counts()
+    return {
+        key: (stored[key], actual[key])
+        for key in sorted(stored.keys() | actual.keys())
+        if stored[key] != actual[key]
+    }
+
+
+def rebuild_counters():
+    with transaction.atomic():
+        counts = actual_counts()
+        TaskCounter.objects.all().delete()
+        TaskCounter.objects.bulk_create([
+            TaskCounter(bucket=bucket, key=key, count=count)
+            for (bucket, key), count in counts.items()
+        ])
+    return counts
+
+
+def task_stats():
+    """
+    Dashboard counts, read from ``TaskCounter`` rather than the task table.
+
+    ``overdue`` counts unfinished tasks whose due date has passed, whether or
+    not their status has been set to OVERDUE yet. Only the ``due`` counters
+    for those statuses and past dates are read, as index range scans.
+    """
+    today = timezone.localdate().isoformat()
+    unfinished = [value for value, _ in Task.STATUS_CHOICES if value not in Task.FINISHED_STATUSES]
+    past_due = reduce(operator.or_, [
+        Q(key__gt=f'{task_status}|', key__lt=f'{task_status}|{today}') for task_status in unfinished
+    ])
+    counters = TaskCounter.objects.filter(
+        Q(bucket__in=('status', 'tag')) | Q(past_due, bucket='due'), count__gt=0
+    )
+
+    by_status = {value: 0 for value, _ in Task.STATUS_CHOICES}
+    tag_counts = {}
+    overdue = 0
+    for bucket, key, count in counters.values_list('bucket', 'key', 'count'):
+        if bucket == 'status':
+            by_status[key] = count
+        elif bucket == 'tag':
+            tag_counts[int(key)] = count
+        else:
+            overdue += count
+
+    names = dict(Tag.objects.filter(pk__in=tag_counts).values_list('id', 'name'))
+    return {
+        'total': sum(by_status.values()),
+        'by_status': by_status,
+        'by_tag': {names[pk]: count for pk, count in tag_counts.items() if pk in names},
+        'overdue': overdue,
+    }
@@ -0,0 +1,101 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Task, TaskTombstone
+from .pagination import PaginationError, parse_limit
+
+SYNC_SETTLE_SECONDS = 5
+
+
+def settle_cutoff():
+    """
+    The newest ``updated_at`` / ``deleted_at`` a sync may hand out.
+
+    Both are stamped before their transaction commits, so a row can become
+    visible after newer ones. Holding changes back for
+    ``SYNC_SETTLE_SECONDS`` (longer than any write transaction) keeps the
+    token from moving past rows that haven't committed yet.
+    """
+    seconds = getattr(settings, 'SYNC_SETTLE_SECONDS', SYNC_SETTLE_SECONDS)
+    return timezone.now() - timedelta(seconds=seconds)
+
+
+def encode_sync_token(updated_at, pk, tombstone_pk):
+    raw = json.dumps([updated_at.isoformat() if updated_at else None, pk, tombstone_pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_sync_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        updated_at, pk, tombstone_pk = json.loads(base64.urlsafe_b64decode(padded))
+        if updated_at is not None:
+            updated_at = parse_datetime(updated_at)
+            if updated_at is None:
+                raise ValueError(token)
+        return updated_at, int(pk), int(tombstone_pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise PaginationError('Invalid sync token')
+
+
+def changes_since(params):
+    """
+    Tasks written and task ids deleted after the position in ``since``.
+
+    Returns ``(tasks, deleted_ids, sync_token, has_more)``. Without ``since``
+    every task is returned and deletions start from now. Changes from the
+    last ``SYNC_SETTLE_SECONDS`` wait for a later call. Clients should
+    apply the upserts before the deletions, and keep calling with the new
+    token while ``has_more`` is true.
+    """
+    limit = parse_limit(params.get('limit'))
+    since = params.get('since')
+    cutoff = settle_cutoff()
+
+    if since:
+        updated_at, pk, tombstone_pk = decode_sync_token(since)
+    else:
+        # Read the deletion watermark first so nothing deleted while the
+        # initial snapshot is read can be missed. It stops short of the
+        # first unsettled tombstone, which a later call picks up.
+        updated_at, pk = None, 0
+        watermark = TaskTombstone.objects.aggregate(
+            last=Max('id'), unsettled=Min('id', filter=Q(deleted_at__gt=cutoff)),
+        )
+        if watermark['unsettled'] is not None:
+            tombstone_pk = watermark['unsettled'] - 1
+        else:
+            tombstone_pk = watermark['last'] or 0
+
+    tasks = Task.objects.prefetch_related('tags').filter(updated_at__lte=cutoff).order_by('updated_at', 'id')
+    if updated_at is not None:
+        tasks = tasks.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+    tasks = list(tasks[:limit + 1])
+
+    tombstones = []
+    rows = (
+        TaskTombstone.objects.filter(id__gt=tombstone_pk)
+        .order_by('id').values_list('id', 'task_id', 'deleted_at')[:limit + 1]
+    )
+    for row in rows:
+        # Ids aren't handed out in commit order either, so stop at the
+        # first unsettled one rather than skipping past it.
+        if row[2] > cutoff:
+            break
+        tombstones.append(row)
+
+    has_more = len(tasks) > limit or len(tombstones) > limit
+    tasks, tombstones = tasks[:limit], tombstones[:limit]
+    if tasks:
+        updated_at, pk = tasks[-1].updated_at, tasks[-1].pk
+    if tombstones:
+        tombstone_pk = tombstones[-1][0]
+
+    deleted = [task_id for _, task_id, _ in tombstones]
+    return tasks, deleted, encode_sync_token(updated_at, pk, tombstone_pk), has_more
@@ -0,0 +1,42 @@
+from django.db import connections, router
+
+from .cache import invalidate_tasks
+from .models import Task, TaskCounter, TaskTombstone
+from .stats import tag_deltas, task_deltas
+
+TASK_DELETE_BATCH_SIZE = 500
+
+
+def bulk_delete_tasks(pks):
+    """
+    Delete tasks ``pks`` and their tag links in a constant number of
+    queries, doing the delete signals' tombstones, counters and cache
+    invalidation in bulk instead of row by row.
+    """
+    pks = list(pks)
+    Through = Task.tags.through
+    rows = list(Task.objects.filter(pk__in=pks).values_list('status', 'due_date'))
+    links = list(Through.objects.filter(task_id__in=pks).values_list('tag_id', flat=True))
+
+    Through.objects.filter(task_id__in=pks).delete()
+    # An explicit DELETE, not QuerySet.delete(): that would fetch every row
+    # and send the per-row signals, whose tombstones, counter updates and
+    # invalidation are done in bulk below and would then happen twice. A
+    # foreign key added to Task later makes this fail loudly rather than
+    # being skipped.
+    connection = connections[router.db_for_write(Task)]
+    quote = connection.ops.quote_name
+    table, pk = quote(Task._meta.db_table), quote(Task._meta.pk.column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), TASK_DELETE_BATCH_SIZE):
+            batch = pks[start:start + TASK_DELETE_BATCH_SIZE]
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {pk} IN ({", ".join(["%s"] * len(batch))})', batch
+            )
+    TaskTombstone.objects.bulk_create([TaskTombstone(task_id=pk) for pk in pks])
+
+    deltas = tag_deltas(links, -1)
+    for before in rows:
+        deltas.update(task_deltas(before, None))
+    TaskCounter.objects.apply(deltas)
+    invalidate_tasks(pks)
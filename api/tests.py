@@ -1,8 +1,39 @@
-from rest_framework.test import APIRequestFactory, force_authenticate, APITestCase
+import base64
+import json
+import tempfile
+import time
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.http import QueryDict
+from django.test import modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate, APITestCase, APITransactionTestCase
 from django.contrib.auth.models import User
 from rest_framework import status
-from api.models import Task
-from api.views import TaskCreateView, TaskDetailView, TaskListView, TaskUpdateView
+from rest_framework.renderers import JSONRenderer
+from api.authentication import credential_cache, issue_token
+from api.benchmark import Benchmark, ClientDriver, compare
+from api.filters import filter_tasks
+from api.metrics import MetricsRegistry, registry
+from api.middleware import MetricsMiddleware, ProfilingMiddleware
+from api.profiling import issue_profile_token, list_profile_ids, load_summary
+from api.cache import task_cache
+from api.models import ArchivedTask, Task, Tag, TaskCounter, TaskTombstone, tag_id_cache
+from api.payloads import TASK_FIELDS, task_payloads
+from api.renderers import FastJSONRenderer, msgpack
+from api.routers import ReplicaRouter, choose_replica, primary_pins, read_alias, replica_health
+from api.serializers import TaskSerializer
+from api.stats import counter_drift
+from api.views import (
+    TaskCreateView, TaskBulkCreateView, TaskDetailView, TaskListView, TaskUpdateView, TaskBatchView,
+    TaskChangesView, TaskExportView, TaskImportView,
+    TaskSearchView, TaskStatsView,
+)
 
 class TaskE2ETests(APITestCase):
     def setUp(self):
@@ -141,6 +172,21 @@ class TaskCreateViewTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_create_with_tags_writes_task_once(self):
+        """Test a new task's tags are linked and counted without updating it or bumping the table version again."""
+        data = {**self.valid_task_data, 'tags': [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]}
+        request = APIRequestFactory().post('/todo/tasks/create/', data, format='json')
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = TaskCreateView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        writes = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse([sql for sql in writes if sql.startswith('UPDATE "api_task" ')])
+        self.assertEqual(len([sql for sql in writes if sql.startswith('UPDATE "api_tableversion"')]), 1)
+        self.assertEqual(Task.objects.get().tags.count(), 3)
+        self.assertEqual(counter_drift(), {})
+
 
 
 class TaskDetailViewTests(APITestCase):
@@ -445,3 +491,1809 @@ class TaskDeleteViewTests(APITestCase):
         print("Response Status Code:", response.status_code)
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskListPaginationTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and a handful of tasks to page through."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', description='Paged task.')
+            for i in range(5)
+        ]
+
+    def get_page(self, query=''):
+        factory = APIRequestFactory()
+        request = factory.get(f'/todo/tasks/{query}', format='json')
+        force_authenticate(request, user=self.user)
+        return TaskListView.as_view()(request)
+
+    def test_pages_follow_cursor(self):
+        """Test walking every page via next_cursor returns each task exactly once, in order."""
+        seen = []
+        response = self.get_page('?limit=2')
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['tasks']), 2)
+            seen.extend(task['id'] for task in response.data['tasks'])
+            if response.data['next_cursor'] is None:
+                break
+            response = self.get_page(f'?limit=2&cursor={response.data["next_cursor"]}')
+
+        self.assertEqual(seen, [task.id for task in self.tasks])
+
+    def test_limit_is_capped(self):
+        """Test the page size never exceeds MAX_PAGE_SIZE."""
+        with patch('api.pagination.MAX_PAGE_SIZE', 3):
+            response = self.get_page('?limit=1000')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tasks']), 3)
+        self.assertIsNotNone(response.data['next_cursor'])
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        response = self.get_page('?cursor=not-a-cursor')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], 'Invalid cursor')
+
+    def test_invalid_limit(self):
+        """Test a non-positive limit is rejected."""
+        response = self.get_page('?limit=0')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], 'Invalid limit')
+
+
+class TaskQueryCountTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and a small tag vocabulary."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.tags = Tag.objects.bulk_create([Tag(name=f'tag-{i}') for i in range(3)])
+        task_cache.clear()
+
+    def seed(self, count):
+        tasks = Task.objects.bulk_create([
+            Task(title=f'Task {i}', description='Seeded task.') for i in range(count)
+        ])
+        Task.tags.through.objects.bulk_create([
+            Task.tags.through(task_id=task.id, tag_id=tag.id)
+            for task in tasks for tag in self.tags
+        ])
+        return tasks
+
+    def assert_list_queries(self, count):
+        self.seed(count)
+        factory = APIRequestFactory()
+        request = factory.get('/todo/tasks/?limit=500', format='json')
+        force_authenticate(request, user=self.user)
+
+        # One query for the table version, one for the page of tasks and
+        # one for all of their tags.
+        with self.assertNumQueries(3):
+            response = TaskListView.as_view()(request)
+            response.render()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tasks']), min(count, 500))
+        self.assertTrue(all(len(task['tags']) == 3 for task in response.data['tasks']))
+
+    def test_list_queries_1_task(self):
+        """Test listing 1 task issues a constant number of queries."""
+        self.assert_list_queries(1)
+
+    def test_list_queries_100_tasks(self):
+        """Test listing 100 tasks issues a constant number of queries."""
+        self.assert_list_queries(100)
+
+    def test_list_queries_10000_tasks(self):
+        """Test listing with 10,000 tasks issues a constant number of queries."""
+        self.assert_list_queries(10000)
+
+    def test_detail_queries(self):
+        """Test retrieving a single task loads its tags in one extra query."""
+        task = self.seed(1)[0]
+        factory = APIRequestFactory()
+        request = factory.get(f'/todo/task/?id={task.id}', format='json')
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(2):
+            response = TaskDetailView.as_view()(request)
+            response.render()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['task']['tags']), 3)
+
+
+class TaskBulkCreateViewTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and an existing tag."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        Tag.objects.create(name='home')
+
+    def post(self, data):
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/bulk_create/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return TaskBulkCreateView.as_view()(request)
+
+    def test_bulk_create_success(self):
+        """Test creating many tasks with shared tags in a constant number of queries."""
+        data = [
+            {'title': f'Task {i}', 'description': 'Bulk task.',
+             'tags': [{'name': 'home'}, {'name': 'errands'}]}
+            for i in range(50)
+        ]
+
+        # Savepoint, insert tasks, look up tags, insert the missing tag,
+        # re-read it, insert links, upsert the counters, bump the table
+        # version, release, then re-read the created tasks with their tags.
+        with self.assertNumQueries(11):
+            response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['message'], 'Tasks created successfully')
+        self.assertEqual(len(response.data['tasks']), 50)
+        self.assertEqual(Task.objects.count(), 50)
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(Task.tags.through.objects.count(), 100)
+        self.assertEqual(
+            sorted(tag['name'] for tag in response.data['tasks'][0]['tags']),
+            ['errands', 'home']
+        )
+
+    def test_bulk_create_distinct_due_dates(self):
+        """Test counters for many distinct due dates cost one upsert per batch of keys, not per date."""
+        start = timezone.localdate()
+
+        def tasks(distinct):
+            return [
+                {'title': f'Task {i}', 'description': 'Bulk task.',
+                 'due_date': (start + timezone.timedelta(days=i if distinct else 0)).isoformat()}
+                for i in range(1000)
+            ]
+
+        with CaptureQueriesContext(connection) as same_date:
+            self.post(tasks(distinct=False))
+        with CaptureQueriesContext(connection) as distinct_dates:
+            response = self.post(tasks(distinct=True))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # 1001 keys (one status, 1000 dates) take four upserts instead of one.
+        self.assertEqual(len(distinct_dates), len(same_date) + 3)
+        self.assertEqual(counter_drift(), {})
+
+    def test_bulk_create_reports_errors_per_item(self):
+        """Test one invalid item rejects the whole batch and is reported by position."""
+        data = [
+            {'title': 'Valid', 'description': 'Fine.'},
+            {'title': '', 'description': 'Missing title.'},
+        ]
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], 'Failed to create tasks')
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('title', response.data['errors'][1])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_bulk_create_requires_list(self):
+        """Test a non-list body is rejected."""
+        response = self.post({'title': 'Not a list'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], 'Expected a list of tasks')
+
+
+class TaskBatchViewTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and tasks to edit."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', description='Batch task.')
+            for i in range(4)
+        ]
+
+    def post(self, data):
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/batch/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return TaskBatchView.as_view()(request)
+
+    def test_batch_success(self):
+        """Test updates and deletes are applied together."""
+        data = [
+            {'op': 'update', 'pk': self.tasks[0].pk, 'title': 'Renamed'},
+            {'op': 'update', 'pk': self.tasks[1].pk, 'status': 'COMPLETED',
+             'tags': [{'name': 'done'}]},
+            {'op': 'delete', 'pk': self.tasks[2].pk},
+        ]
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], 'Batch applied successfully')
+        self.assertEqual(response.data['updated'], [self.tasks[0].pk, self.tasks[1].pk])
+        self.assertEqual(response.data['deleted'], [self.tasks[2].pk])
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).title, 'Renamed')
+        self.assertEqual(Task.objects.get(pk=self.tasks[1].pk).status, 'COMPLETED')
+        self.assertEqual(
+            list(Task.objects.get(pk=self.tasks[1].pk).tags.values_list('name', flat=True)),
+            ['done']
+        )
+        self.assertFalse(Task.objects.filter(pk=self.tasks[2].pk).exists())
+
+    def test_batch_deletes_in_bulk(self):
+        """Test deletes cost the same number of queries however many tasks go, with tombstones and counters kept."""
+        tag = Tag.objects.create(name='home')
+        tasks = [Task.objects.create(title=f'Extra {i}', description='Batch task.') for i in range(100)]
+        for task in tasks:
+            task.tags.add(tag)
+
+        with CaptureQueriesContext(connection) as one:
+            self.post([{'op': 'delete', 'pk': self.tasks[0].pk}])
+        with CaptureQueriesContext(connection) as many:
+            response = self.post([{'op': 'delete', 'pk': task.pk} for task in tasks])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(many), len(one))
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertEqual(TaskTombstone.objects.count(), 101)
+        self.assertEqual(counter_drift(), {})
+
+    def test_batch_deletes_more_tasks_than_one_statement_takes(self):
+        """Test a delete larger than TASK_DELETE_BATCH_SIZE removes every task."""
+        with patch('api.tasks.TASK_DELETE_BATCH_SIZE', 2):
+            response = self.post([{'op': 'delete', 'pk': task.pk} for task in self.tasks])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(TaskTombstone.objects.count(), len(self.tasks))
+        self.assertEqual(counter_drift(), {})
+
+    def test_batch_is_atomic(self):
+        """Test a single bad operation leaves every task untouched."""
+        data = [
+            {'op': 'delete', 'pk': self.tasks[0].pk},
+            {'op': 'update', 'pk': 9999, 'title': 'Missing'},
+            {'op': 'archive', 'pk': self.tasks[1].pk},
+        ]
+        response = self.post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], 'Failed to apply batch')
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertEqual(response.data['errors'][1], {'pk': ['Task not found']})
+        self.assertIn('op', response.data['errors'][2])
+        self.assertEqual(Task.objects.count(), 4)
+
+
+class TaskDiffUpdateTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and tagged tasks."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.home = Tag.objects.create(name='home')
+        self.work = Tag.objects.create(name='work')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', description='Diff task.', status='OPEN')
+            for i in range(2)
+        ]
+        for task in self.tasks:
+            task.tags.add(self.home, self.work)
+
+    def update(self, data):
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/update/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return TaskUpdateView.as_view()(request)
+
+    def batch(self, data):
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/batch/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return TaskBatchView.as_view()(request)
+
+    def writes(self, queries):
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(('UPDATE', 'INSERT', 'DELETE'))
+        ]
+
+    def test_unchanged_update_writes_nothing(self):
+        """Test an update that changes nothing skips every write."""
+        task = self.tasks[0]
+        task.refresh_from_db()
+        updated_at = task.updated_at
+        with CaptureQueriesContext(connection) as queries:
+            response = self.update({
+                'pk': task.pk, 'title': 'Task 0', 'status': 'OPEN',
+                'tags': [{'name': 'work'}, {'name': 'home'}]
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.writes(queries), [])
+        task.refresh_from_db()
+        self.assertEqual(task.updated_at, updated_at)
+
+    def test_update_writes_changed_columns_only(self):
+        """Test only the changed columns appear in the UPDATE."""
+        task = self.tasks[0]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.update({'pk': task.pk, 'title': 'Renamed', 'status': 'OPEN'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updates = [sql for sql in self.writes(queries) if sql.startswith('UPDATE "api_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertIn('"updated_at"', updates[0])
+        self.assertNotIn('"status"', updates[0])
+        self.assertNotIn('"description"', updates[0])
+
+    def test_update_writes_changed_tag_links_only(self):
+        """Test a changed tag set deletes and inserts only the differing links."""
+        task = self.tasks[0]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.update({'pk': task.pk, 'tags': [{'name': 'work'}, {'name': 'errands'}]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        errands = Tag.objects.get(name='errands')
+        links = [sql for sql in self.writes(queries) if '"api_task_tags"' in sql]
+        self.assertEqual(len(links), 2)
+        self.assertTrue(links[0].startswith('DELETE'))
+        self.assertIn(str(self.home.pk), links[0])
+        self.assertTrue(links[1].startswith('INSERT'))
+        self.assertEqual(set(task.tags.values_list('name', flat=True)), {'work', 'errands'})
+        self.assertEqual(errands.task_set.count(), 1)
+        self.assertEqual(counter_drift(), {})
+
+    def test_batch_writes_changes_only(self):
+        """Test a batch skips unchanged tasks and writes only the differing links."""
+        first, second = self.tasks
+        with CaptureQueriesContext(connection) as queries:
+            response = self.batch([
+                {'op': 'update', 'pk': first.pk, 'title': 'Task 0', 'tags': [{'name': 'home'}, {'name': 'work'}]},
+                {'op': 'update', 'pk': second.pk, 'status': 'WORKING', 'tags': [{'name': 'home'}]},
+            ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updates = [sql for sql in self.writes(queries) if sql.startswith('UPDATE "api_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"title"', updates[0])
+        self.assertIn('"status"', updates[0])
+        links = [sql for sql in self.writes(queries) if '"api_task_tags"' in sql]
+        self.assertEqual(len(links), 1)
+        self.assertTrue(links[0].startswith('DELETE'))
+        self.assertEqual(list(second.tags.values_list('name', flat=True)), ['home'])
+        self.assertEqual(first.tags.count(), 2)
+        self.assertEqual(counter_drift(), {})
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and an empty credential cache."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        credential_cache.clear()
+
+    def basic(self, password='testpassword'):
+        credentials = base64.b64encode(f'testuser:{password}'.encode()).decode()
+        return {'HTTP_AUTHORIZATION': f'Basic {credentials}'}
+
+    def test_password_is_verified_once(self):
+        """Test repeated requests with the same credentials skip the password hasher."""
+        with patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check:
+            for _ in range(3):
+                response = self.client.get('/todo/tasks/', **self.basic())
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(check.call_count, 1)
+
+    def test_wrong_password_is_not_cached(self):
+        """Test a bad password is rejected even after a good one was cached."""
+        self.client.get('/todo/tasks/', **self.basic())
+        response = self.client.get('/todo/tasks/', **self.basic('wrong'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates(self):
+        """Test cached credentials stop working once the password changes."""
+        self.client.get('/todo/tasks/', **self.basic())
+        self.user.set_password('newpassword')
+        self.user.save()
+
+        response = self.client.get('/todo/tasks/', **self.basic())
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_invalidates(self):
+        """Test cached credentials stop working once the user is deactivated."""
+        self.client.get('/todo/tasks/', **self.basic())
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = self.client.get('/todo/tasks/', **self.basic())
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_exchange(self):
+        """Test a token obtained with Basic credentials authenticates later requests."""
+        response = self.client.post('/todo/auth/token/', **self.basic())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = response.data['token']
+
+        response = self.client.get('/todo/tasks/', HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.set_password('newpassword')
+        self.user.save()
+        response = self.client.get('/todo/tasks/', HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TaskDetailCacheTests(APITestCase):
+    def setUp(self):
+        """Setup a test user, a tagged task and an empty payload cache."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.task = Task.objects.create(title='Cached Task', description='Hot task.')
+        self.task.tags.add(Tag.objects.create(name='hot'))
+        task_cache.clear()
+
+    def get_task(self):
+        factory = APIRequestFactory()
+        request = factory.get(f'/todo/task/?id={self.task.pk}', format='json')
+        force_authenticate(request, user=self.user)
+        return TaskDetailView.as_view()(request)
+
+    def test_second_read_is_served_from_cache(self):
+        """Test a repeated read skips the database and counts a hit."""
+        before = task_cache.stats()
+        self.get_task()
+        with self.assertNumQueries(0):
+            response = self.get_task()
+
+        self.assertEqual(response.data['task']['title'], 'Cached Task')
+        after = task_cache.stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+    def test_update_invalidates(self):
+        """Test TaskUpdateView never leaves a stale entry behind."""
+        self.get_task()
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/update/', {'pk': self.task.pk, 'title': 'Fresh'}, format='json')
+        force_authenticate(request, user=self.user)
+        TaskUpdateView.as_view()(request)
+
+        self.assertEqual(self.get_task().data['task']['title'], 'Fresh')
+
+    def test_tag_changes_invalidate(self):
+        """Test adding a tag or renaming one refreshes the cached payload."""
+        self.get_task()
+        self.task.tags.add(Tag.objects.create(name='new'))
+        self.assertEqual(len(self.get_task().data['task']['tags']), 2)
+
+        tag = Tag.objects.get(name='hot')
+        tag.name = 'renamed'
+        tag.save()
+        names = sorted(tag['name'] for tag in self.get_task().data['task']['tags'])
+        self.assertEqual(names, ['new', 'renamed'])
+
+    def test_delete_invalidates(self):
+        """Test a deleted task is no longer served."""
+        self.get_task()
+        self.task.delete()
+
+        self.assertEqual(self.get_task().status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch_invalidates(self):
+        """Test bulk updates, which skip model signals, still invalidate."""
+        self.get_task()
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/batch/', [{'op': 'update', 'pk': self.task.pk, 'status': 'WORKING'}], format='json')
+        force_authenticate(request, user=self.user)
+        TaskBatchView.as_view()(request)
+
+        self.assertEqual(self.get_task().data['task']['status'], 'WORKING')
+
+    @override_settings(TASK_CACHE_ALIAS='default')
+    def test_django_cache_backend(self):
+        """Test payloads can live in one of Django's caches instead."""
+        self.get_task()
+        with self.assertNumQueries(0):
+            response = self.get_task()
+        self.assertEqual(response.data['task']['title'], 'Cached Task')
+
+    @override_settings(TASK_CACHE_LOCAL_TTL=5)
+    def test_local_entries_expire_quickly(self):
+        """Test the per-process cache can't serve another worker's stale payload for long."""
+        self.get_task()
+        # A write in another process, which can't reach this one's cache.
+        Task.objects.filter(pk=self.task.pk).update(title='Elsewhere')
+        self.assertEqual(self.get_task().data['task']['title'], 'Cached Task')
+
+        later = time.monotonic() + 6
+        with patch('api.cache.time.monotonic', return_value=later):
+            self.assertEqual(self.get_task().data['task']['title'], 'Elsewhere')
+
+
+class TaskConditionalRequestTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and a task."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.task = Task.objects.create(title='Polled Task', description='Polled.')
+        task_cache.clear()
+
+    def get(self, view, path, etag=None):
+        factory = APIRequestFactory()
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = factory.get(path, format='json', **headers)
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request)
+
+    def test_list_not_modified(self):
+        """Test an unchanged list answers 304 after only reading the table version."""
+        etag = self.get(TaskListView, '/todo/tasks/')['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.get(TaskListView, '/todo/tasks/', etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_list_changes_after_write(self):
+        """Test any write to tasks changes the list ETag."""
+        etag = self.get(TaskListView, '/todo/tasks/')['ETag']
+        Task.objects.create(title='Another', description='New.')
+
+        response = self.get(TaskListView, '/todo/tasks/', etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_depends_on_query(self):
+        """Test different pages of the list get different ETags."""
+        first = self.get(TaskListView, '/todo/tasks/')['ETag']
+        second = self.get(TaskListView, '/todo/tasks/?limit=1')['ETag']
+
+        self.assertNotEqual(first, second)
+
+    def test_detail_not_modified(self):
+        """Test an unchanged cached task answers 304 without touching the database."""
+        path = f'/todo/task/?id={self.task.pk}'
+        etag = self.get(TaskDetailView, path)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get(TaskDetailView, path, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.task.title = 'Changed'
+        self.task.save()
+        response = self.get(TaskDetailView, path, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['task']['title'], 'Changed')
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class TaskChangesViewTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and a couple of tasks."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.first = Task.objects.create(title='First', description='Synced.')
+        self.second = Task.objects.create(title='Second', description='Synced.')
+
+    def get_changes(self, query=''):
+        factory = APIRequestFactory()
+        request = factory.get(f'/todo/tasks/changes{query}', format='json')
+        force_authenticate(request, user=self.user)
+        return TaskChangesView.as_view()(request)
+
+    def test_initial_sync_returns_everything(self):
+        """Test a sync without a token returns every task and no deletions."""
+        response = self.get_changes()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.first.pk, self.second.pk])
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+
+    def test_incremental_sync(self):
+        """Test only writes, tag changes and deletions after the token are returned."""
+        token = self.get_changes().data['sync_token']
+        self.assertEqual(self.get_changes(f'?since={token}').data['tasks'], [])
+
+        self.first.tags.add(Tag.objects.create(name='new'))
+        third = Task.objects.create(title='Third', description='Synced.')
+        deleted_pk = self.second.pk
+        self.second.delete()
+
+        response = self.get_changes(f'?since={token}')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.first.pk, third.pk])
+        self.assertEqual(response.data['deleted'], [deleted_pk])
+
+        response = self.get_changes(f'?since={response.data["sync_token"]}')
+        self.assertEqual(response.data['tasks'], [])
+        self.assertEqual(response.data['deleted'], [])
+
+    def test_batch_updates_are_synced(self):
+        """Test bulk updates, which skip auto_now, still show up as changes."""
+        token = self.get_changes().data['sync_token']
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/batch/', [{'op': 'update', 'pk': self.first.pk, 'status': 'WORKING'}], format='json')
+        force_authenticate(request, user=self.user)
+        TaskBatchView.as_view()(request)
+
+        response = self.get_changes(f'?since={token}')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.first.pk])
+
+    def test_has_more(self):
+        """Test a limited page says more changes are waiting."""
+        response = self.get_changes('?limit=1')
+
+        self.assertEqual(len(response.data['tasks']), 1)
+        self.assertTrue(response.data['has_more'])
+        response = self.get_changes(f'?limit=1&since={response.data["sync_token"]}')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.second.pk])
+
+    def test_invalid_token(self):
+        """Test a malformed sync token is rejected."""
+        response = self.get_changes('?since=garbage')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], 'Invalid sync token')
+
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_recent_changes_wait_to_settle(self):
+        """Test writes and deletions inside the settle window are held back, not skipped."""
+        response = self.get_changes()
+        self.assertEqual(response.data['tasks'], [])
+        token = response.data['sync_token']
+        third = Task.objects.create(title='Third', description='Synced.')
+        deleted_pk = self.first.pk
+        self.first.delete()
+
+        response = self.get_changes(f'?since={token}')
+        self.assertEqual(response.data['tasks'], [])
+        self.assertEqual(response.data['deleted'], [])
+        self.assertEqual(response.data['sync_token'], token)
+
+        with patch('api.sync.timezone.now', return_value=timezone.now() + timezone.timedelta(seconds=61)):
+            response = self.get_changes(f'?since={token}')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.second.pk, third.pk])
+        self.assertEqual(response.data['deleted'], [deleted_pk])
+
+
+class TaskExportViewTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and some tagged tasks."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        tag = Tag.objects.create(name='exported')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', description='Exported task.')
+            for i in range(5)
+        ]
+        for task in self.tasks:
+            task.tags.add(tag)
+
+    def export(self):
+        factory = APIRequestFactory()
+        request = factory.get('/todo/tasks/export')
+        force_authenticate(request, user=self.user)
+        return TaskExportView.as_view()(request)
+
+    def test_export_streams_ndjson(self):
+        """Test every task is emitted as one JSON line matching the task serializer."""
+        response = self.export()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [task.pk for task in self.tasks])
+        self.assertEqual(json.loads(lines[0])['tags'][0]['name'], 'exported')
+
+    def test_export_loads_tags_per_chunk(self):
+        """Test tags are loaded once per chunk, not once per task."""
+        response = self.export()
+        # The task scan plus one tag query for each of the three chunks.
+        with patch('api.ndjson.EXPORT_CHUNK_SIZE', 2), self.assertNumQueries(4):
+            content = b''.join(response.streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 5)
+
+
+class TaskImportTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and an NDJSON body with one bad line."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.lines = [
+            json.dumps({'title': 'One', 'description': 'Imported.', 'tags': [{'name': 'imported'}]}),
+            '',
+            json.dumps({'title': '', 'description': 'Missing title.'}),
+            'not json',
+            json.dumps({'title': 'Two', 'description': 'Imported.', 'tags': [{'name': 'imported'}]}),
+            json.dumps({'title': 'Three', 'description': 'Imported.'}),
+        ]
+
+    def test_import_view(self):
+        """Test valid lines are imported in batches and bad lines reported by number."""
+        factory = APIRequestFactory()
+        body = '\n'.join(self.lines).encode()
+        request = factory.post('/todo/tasks/import?batch_size=2', body, content_type='application/x-ndjson')
+        force_authenticate(request, user=self.user)
+        response = TaskImportView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['imported'], 3)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 4])
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertEqual(Tag.objects.get(name='imported').task_set.count(), 2)
+
+    def test_import_command(self):
+        """Test manage.py import_tasks reads a file and reports progress and errors."""
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as source:
+            source.write('\n'.join(self.lines))
+            source.flush()
+            stdout, stderr = StringIO(), StringIO()
+            call_command('import_tasks', source.name, batch_size=2, stdout=stdout, stderr=stderr)
+
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertIn('imported 3 tasks, 2 lines failed', stdout.getvalue())
+        self.assertIn('Line 3:', stderr.getvalue())
+        self.assertIn('Line 4:', stderr.getvalue())
+
+
+class TaskListFilterTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and tasks spread over statuses, due dates and tags."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.open_soon = Task.objects.create(title='Open soon', description='.', status='OPEN', due_date='2024-01-10')
+        self.open_later = Task.objects.create(title='Open later', description='.', status='OPEN', due_date='2024-03-01')
+        self.working = Task.objects.create(title='Working', description='.', status='WORKING', due_date='2024-01-15')
+        self.done = Task.objects.create(title='Done', description='.', status='COMPLETED')
+        self.open_soon.tags.add(Tag.objects.create(name='home'))
+        self.working.tags.add(Tag.objects.create(name='work'), Tag.objects.get(name='home'))
+
+    def get_ids(self, query):
+        factory = APIRequestFactory()
+        request = factory.get(f'/todo/tasks/{query}', format='json')
+        force_authenticate(request, user=self.user)
+        response = TaskListView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['id'] for task in response.data['tasks']]
+
+    def test_filter_by_status_set(self):
+        """Test filtering on several statuses."""
+        self.assertEqual(
+            self.get_ids('?status=OPEN,WORKING'),
+            [self.open_soon.pk, self.open_later.pk, self.working.pk]
+        )
+
+    def test_filter_by_due_date_range(self):
+        """Test filtering on an inclusive due date range combined with status."""
+        self.assertEqual(
+            self.get_ids('?status=OPEN&due_after=2024-01-01&due_before=2024-01-31'),
+            [self.open_soon.pk]
+        )
+
+    def test_filter_by_created_range(self):
+        """Test filtering on creation time."""
+        self.assertEqual(self.get_ids('?created_after=2000-01-01&created_before=2000-01-02'), [])
+        self.assertEqual(len(self.get_ids('?created_after=2000-01-01')), 4)
+
+    def test_filter_by_tag(self):
+        """Test filtering by tag returns each matching task once."""
+        self.assertEqual(self.get_ids('?tag=home,work'), [self.open_soon.pk, self.working.pk])
+
+    def test_invalid_filter(self):
+        """Test unknown statuses and malformed dates are rejected."""
+        factory = APIRequestFactory()
+        for query in ('?status=DONE', '?due_after=soon', '?created_before=yesterday'):
+            request = factory.get(f'/todo/tasks/{query}', format='json')
+            force_authenticate(request, user=self.user)
+            response = TaskListView.as_view()(request)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Query plans are checked on SQLite')
+    def test_filters_use_indexes(self):
+        """Test each filter is answered from an index rather than a table scan."""
+        for params in (
+            {'status': 'OPEN,WORKING'},
+            {'status': 'OPEN', 'due_after': '2024-01-01'},
+            {'due_after': '2024-01-01', 'due_before': '2024-01-31'},
+            {'created_after': '2024-01-01'},
+            {'tag': 'home'},
+        ):
+            query = QueryDict(mutable=True)
+            query.update(params)
+            plan = filter_tasks(Task.objects.order_by('timestamp', 'id'), query).explain()
+            for line in plan.splitlines():
+                self.assertNotRegex(line, r'\bSCAN\b', f'{params} scans a table or index:\n{plan}')
+
+
+class TaskSearchViewTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and tasks to search."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.in_description = Task.objects.create(title='Errands', description='Pick up groceries and milk.')
+        self.in_title = Task.objects.create(title='Buy milk', description='From the corner shop.')
+        self.unrelated = Task.objects.create(title='Call mom', description='Sunday afternoon.')
+
+    def search(self, query):
+        factory = APIRequestFactory()
+        request = factory.get(f'/todo/tasks/search{query}', format='json')
+        force_authenticate(request, user=self.user)
+        return TaskSearchView.as_view()(request)
+
+    def ids(self, query):
+        response = self.search(query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['id'] for task in response.data['tasks']]
+
+    def test_search_ranks_title_matches_first(self):
+        """Test matches are ranked, with title matches above description matches."""
+        self.assertEqual(self.ids('?q=milk'), [self.in_title.pk, self.in_description.pk])
+
+    def test_search_matches_prefix_and_all_terms(self):
+        """Test every term must match and the last one may be a prefix."""
+        self.assertEqual(self.ids('?q=groceries+mi'), [self.in_description.pk])
+
+    def test_search_follows_writes(self):
+        """Test updates and deletes are reflected in the index."""
+        self.in_title.title = 'Buy bread'
+        self.in_title.save()
+        self.in_description.delete()
+
+        self.assertEqual(self.ids('?q=milk'), [])
+        self.assertEqual(self.ids('?q=bread'), [self.in_title.pk])
+
+    def test_search_pagination(self):
+        """Test results are paged with next_offset."""
+        response = self.search('?q=milk&limit=1')
+        self.assertEqual(response.data['next_offset'], 1)
+
+        response = self.search('?q=milk&limit=1&offset=1')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.in_description.pk])
+        self.assertIsNone(response.data['next_offset'])
+
+    def test_search_requires_query(self):
+        """Test an empty query is rejected."""
+        response = self.search('?q=+')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['message'], 'Search query is required')
+
+
+class TagIdCacheTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and an empty tag cache."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        tag_id_cache.clear()
+
+    def create_task(self, tags):
+        factory = APIRequestFactory()
+        data = {'title': 'Tagged', 'description': 'Tagged task.', 'tags': [{'name': name} for name in tags]}
+        request = factory.post('/todo/tasks/create/', data, format='json')
+        force_authenticate(request, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return TaskCreateView.as_view()(request)
+
+    def test_known_tags_are_confirmed_in_one_query(self):
+        """Test once names are cached, creating tasks with them only confirms their ids."""
+        self.create_task(['home', 'work'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create_task(['home', 'work'])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        tag_queries = [
+            query['sql'] for query in queries
+            if 'FROM "api_tag" WHERE' in query['sql'] or 'INTO "api_tag" ' in query['sql']
+        ]
+        self.assertEqual(len(tag_queries), 1)
+        self.assertIn('"api_tag"."id" IN', tag_queries[0])
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_resolve_names_batches_unknown_names(self):
+        """Test unknown names are looked up and inserted in one go."""
+        Tag.objects.create(name='existing')
+        with self.assertNumQueries(3):
+            tag_ids = Tag.objects.resolve_names(['existing', 'new-1', 'new-2'])
+
+        self.assertEqual(set(tag_ids), {'existing', 'new-1', 'new-2'})
+
+    def test_rename_invalidates(self):
+        """Test a renamed tag's old name is no longer resolved to it."""
+        self.create_task(['home'])
+        tag = Tag.objects.get(name='home')
+        tag.name = 'house'
+        tag.save()
+
+        self.create_task(['home'])
+        self.assertNotEqual(Tag.objects.get(name='home').pk, tag.pk)
+
+    def test_changes_behind_the_cache(self):
+        """Test a tag another worker renamed or deleted is never linked from a stale cache entry."""
+        with self.captureOnCommitCallbacks(execute=True):
+            tag_ids = Tag.objects.resolve_names(['home', 'work'])
+        # Writes from another process, whose signals can't reach this cache.
+        Tag.objects.filter(name='home').update(name='house')
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM api_tag WHERE name = %s', ['work'])
+
+        response = self.create_task(['home', 'work'])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        tags = Task.objects.get(pk=response.data['task']['id']).tags.all()
+        self.assertEqual(sorted(tag.name for tag in tags), ['home', 'work'])
+        self.assertNotIn(tag_ids['home'], [tag.pk for tag in tags])
+
+
+class TaskStatsTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and a few tagged tasks."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.home = Tag.objects.create(name='home')
+        self.work = Tag.objects.create(name='work')
+        self.late = Task.objects.create(title='Late', description='Past due.', due_date='2000-01-01')
+        self.late.tags.add(self.home, self.work)
+        self.done = Task.objects.create(
+            title='Done', description='Past due but finished.', due_date='2000-01-01', status='COMPLETED'
+        )
+        self.done.tags.add(self.home)
+        self.later = Task.objects.create(title='Later', description='Due later.', due_date='2999-01-01')
+
+    def get_stats(self):
+        factory = APIRequestFactory()
+        request = factory.get('/todo/tasks/stats')
+        force_authenticate(request, user=self.user)
+        return TaskStatsView.as_view()(request)
+
+    def test_stats(self):
+        """Test counts by status and tag and overdue counts come from the counters in two queries."""
+        with self.assertNumQueries(2):
+            response = self.get_stats()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], 'Task statistics retrieved successfully')
+        stats = response.data['stats']
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(stats['by_status']['OPEN'], 2)
+        self.assertEqual(stats['by_status']['COMPLETED'], 1)
+        self.assertEqual(stats['by_status']['CANCELLED'], 0)
+        self.assertEqual(stats['by_tag'], {'home': 2, 'work': 1})
+        self.assertEqual(stats['overdue'], 1)
+
+    def test_counters_follow_writes(self):
+        """Test updates, tag changes and deletes through every write path keep counters exact."""
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/update', {
+            'pk': self.later.pk, 'status': 'CANCELLED', 'tags': [{'name': 'work'}, {'name': 'new'}]
+        }, format='json')
+        force_authenticate(request, user=self.user)
+        TaskUpdateView.as_view()(request)
+
+        self.late.tags.remove(self.work)
+        self.home.task_set.clear()
+        self.done.delete()
+        TaskBatchView.as_view()(self._batch_request([
+            {'op': 'update', 'pk': self.late.pk, 'due_date': '2999-06-01', 'tags': [{'name': 'new'}]},
+        ]))
+        self.work.delete()
+
+        self.assertEqual(counter_drift(), {})
+        stats = self.get_stats().data['stats']
+        self.assertEqual(stats['by_status']['CANCELLED'], 1)
+        self.assertEqual(stats['by_tag'], {'new': 2})
+        self.assertEqual(stats['overdue'], 0)
+
+    def test_emptied_counters_are_deleted(self):
+        """Test counters brought to zero are removed, and stats never read future or finished due dates."""
+        self.later.delete()
+        self.late.status = 'COMPLETED'
+        self.late.save()
+
+        self.assertFalse(TaskCounter.objects.filter(count=0).exists())
+        self.assertFalse(TaskCounter.objects.filter(bucket='due', key__startswith='OPEN|').exists())
+        self.assertEqual(counter_drift(), {})
+
+        Task.objects.create(title='Future', description='Due later.', due_date='2999-01-01')
+        with CaptureQueriesContext(connection) as queries:
+            stats = self.get_stats().data['stats']
+        self.assertEqual(stats['overdue'], 0)
+        self.assertIn('"api_taskcounter"."key" <', queries[0]['sql'])
+
+    def _batch_request(self, data):
+        request = APIRequestFactory().post('/todo/tasks/batch/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return request
+
+    def test_bulk_create_keeps_counters(self):
+        """Test bulk-created tasks and their tags are counted."""
+        request = APIRequestFactory().post('/todo/tasks/bulk_create/', [
+            {'title': 'A', 'description': 'Bulk.', 'due_date': '2000-01-02', 'tags': [{'name': 'home'}]},
+            {'title': 'B', 'description': 'Bulk.', 'status': 'WORKING'},
+        ], format='json')
+        force_authenticate(request, user=self.user)
+        TaskBulkCreateView.as_view()(request)
+
+        self.assertEqual(counter_drift(), {})
+        self.assertEqual(self.get_stats().data['stats']['overdue'], 2)
+
+    def test_rebuild_command(self):
+        """Test rebuild_task_stats --check reports drift and a rebuild repairs it."""
+        TaskCounter.objects.filter(bucket='status', key='OPEN').update(count=10)
+
+        stdout = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_stats', check=True, stdout=stdout)
+        self.assertIn('status OPEN: stored 10, actual 2', stdout.getvalue())
+
+        call_command('rebuild_task_stats', stdout=StringIO())
+        self.assertEqual(counter_drift(), {})
+        call_command('rebuild_task_stats', check=True, stdout=StringIO())
+
+
+class MarkOverdueTests(APITestCase):
+    def setUp(self):
+        """Setup tasks on both sides of today in every kind of status."""
+        self.late = [
+            Task.objects.create(title=f'Late {i}', description='Past due.', due_date='2000-01-01', status=status)
+            for i, status in enumerate(['OPEN', 'WORKING', 'PENDING_REVIEW', 'OPEN', 'OPEN'])
+        ]
+        self.finished = Task.objects.create(
+            title='Done', description='Past due but finished.', due_date='2000-01-01', status='COMPLETED'
+        )
+        self.later = Task.objects.create(title='Later', description='Due later.', due_date='2999-01-01')
+        self.undated = Task.objects.create(title='Undated', description='No due date.')
+
+    def test_mark_overdue_in_chunks(self):
+        """Test only unfinished past-due tasks move, in chunked updates that keep counters exact."""
+        stdout = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('mark_overdue', chunk_size=2, stdout=stdout)
+
+        self.assertIn('Marked 5 tasks overdue', stdout.getvalue())
+        self.assertEqual(
+            sorted(Task.objects.filter(status='OVERDUE').values_list('pk', flat=True)),
+            [task.pk for task in self.late]
+        )
+        self.assertEqual(Task.objects.get(pk=self.finished.pk).status, 'COMPLETED')
+        self.assertEqual(Task.objects.get(pk=self.later.pk).status, 'OPEN')
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "api_task" ')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(counter_drift(), {})
+
+        self.assertGreater(Task.objects.get(pk=self.late[0].pk).updated_at, self.late[0].updated_at)
+
+    def test_candidates_use_index(self):
+        """Test the sweep finds candidates through the (status, due_date) index."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan check is SQLite specific')
+        pending = Task.objects.filter(status__in=Task.ACTIVE_STATUSES, due_date__lt='2026-01-01')
+        sql, params = pending.values_list('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('task_status_due_date_idx', plan)
+
+    def test_loop_reports_each_pass(self):
+        """Test --loop sweeps, sleeps until the next pass and stops cleanly when interrupted."""
+        stdout = StringIO()
+        with patch('api.management.commands.mark_overdue.time.sleep', side_effect=[None, KeyboardInterrupt]) as sleep:
+            call_command('mark_overdue', loop=True, interval=60, stdout=stdout)
+
+        lines = stdout.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('Marked 5 tasks overdue in '))
+        self.assertTrue(lines[1].startswith('Marked 0 tasks overdue in '))
+        self.assertEqual(lines[2], 'Stopped.')
+        self.assertEqual(sleep.call_count, 2)
+        self.assertLessEqual(sleep.call_args[0][0], 60)
+
+
+class AsyncViewTests(APITestCase):
+    def setUp(self):
+        """Setup a test user, a token and a tagged task."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.headers = {'Authorization': f'Token {issue_token(self.user)}'}
+        self.task = Task.objects.create(title='Async', description='Served async.')
+        self.task.tags.add(Tag.objects.create(name='home'))
+        task_cache.clear()
+
+    async def test_create_and_detail(self):
+        """Test an async-created task can be read back, with ETag revalidation."""
+        response = await self.async_client.post(
+            '/todo/async/tasks/create', {'title': 'New', 'description': 'Created async.', 'tags': [{'name': 'work'}]},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = response.json()['task']
+        self.assertEqual([tag['name'] for tag in created['tags']], ['work'])
+
+        response = await self.async_client.get(f"/todo/async/task/?id={created['id']}", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['task'], created)
+
+        response = await self.async_client.get(
+            f"/todo/async/task/?id={created['id']}", headers={**self.headers, 'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_list(self):
+        """Test the async list pages and filters like the sync one."""
+        await Task.objects.acreate(title='Other', description='Second task.')
+        response = await self.async_client.get('/todo/async/tasks/?limit=1', headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([task['title'] for task in data['tasks']], ['Async'])
+        self.assertEqual(data['tasks'][0]['tags'], [{'id': data['tasks'][0]['tags'][0]['id'], 'name': 'home'}])
+        self.assertIsNotNone(data['next_cursor'])
+
+        response = await self.async_client.get('/todo/async/tasks/?status=BOGUS', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_update_and_delete(self):
+        """Test async updates and deletes, and a missing task."""
+        response = await self.async_client.post(
+            '/todo/async/tasks/update', {'pk': self.task.pk, 'status': 'COMPLETED'},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((await Task.objects.aget(pk=self.task.pk)).status, 'COMPLETED')
+
+        response = await self.async_client.delete(
+            '/todo/async/tasks/delete', {'pk': self.task.pk}, content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Task.objects.filter(pk=self.task.pk).aexists())
+
+        response = await self.async_client.delete(
+            '/todo/async/tasks/delete', {'pk': self.task.pk}, content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_authentication(self):
+        """Test Basic credentials are accepted and missing or bad tokens rejected."""
+        basic = base64.b64encode(b'testuser:testpassword').decode()
+        response = await self.async_client.get('/todo/async/tasks/', headers={'Authorization': f'Basic {basic}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = await self.async_client.get('/todo/async/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await self.async_client.get('/todo/async/tasks/', headers={'Authorization': 'Token bogus'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), {'detail': 'Invalid or expired token.'})
+
+    async def test_same_parameters_as_sync(self):
+        """Test sparse fields, archived tasks and MessagePack give the sync views' bodies."""
+        archived = await ArchivedTask.objects.acreate(
+            id=self.task.pk + 100, title='Archived', description='Moved out.', status='COMPLETED',
+            timestamp=timezone.now(), updated_at=timezone.now(), archived_at=timezone.now(),
+        )
+        await archived.tags.aadd(await Tag.objects.aget(name='home'))
+        queries = [
+            'tasks/?fields=id,tags',
+            'tasks/?include_archived=true&fields=title',
+            'tasks/?include_archived=true',
+            f'task/?id={self.task.pk}&fields=title,status',
+            f'task/?id={archived.pk}&include_archived=true',
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                plain = await self.async_client.get(f'/todo/{query}', headers=self.headers)
+                response = await self.async_client.get(f'/todo/async/{query}', headers=self.headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json(), plain.json())
+
+        response = await self.async_client.get('/todo/async/tasks/?fields=bogus', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    async def test_msgpack(self):
+        """Test MessagePack bodies are parsed and rendered when asked for."""
+        headers = {**self.headers, 'Accept': 'application/msgpack'}
+        body = msgpack.packb({'title': 'Packed', 'description': 'Created async.', 'tags': [{'name': 'binary'}]})
+        response = await self.async_client.post(
+            '/todo/async/tasks/create', body, content_type='application/msgpack', headers=headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        created = msgpack.unpackb(response.content)['task']
+        self.assertEqual([tag['name'] for tag in created['tags']], ['binary'])
+
+        response = await self.async_client.get(f"/todo/async/task/?id={created['id']}", headers=headers)
+        self.assertEqual(msgpack.unpackb(response.content)['task'], created)
+
+        response = await self.async_client.post(
+            '/todo/async/tasks/create', b'\xc1', content_type='application/msgpack', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FastPayloadTests(APITestCase):
+    def setUp(self):
+        """Setup tasks with awkward text, several tags and no due date."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        tricky = 'Quote " backslash \\ tab \t nul \x00 line sep \u2028 para sep \u2029 caf\u00e9 \U0001F600'
+        self.tasks = [
+            Task.objects.create(title=tricky, description=tricky, due_date='2024-02-29', status='WORKING'),
+            Task.objects.create(title='Plain', description='No tags, no due date.'),
+        ]
+        self.tasks[0].tags.add(Tag.objects.create(name='z-last'), Tag.objects.create(name='a-first'))
+
+    def reference(self, data):
+        return JSONRenderer().render(data)
+
+    def test_payloads_match_serializer(self):
+        """Test fast payloads render to exactly the bytes TaskSerializer and JSONRenderer produce."""
+        tasks = Task.objects.prefetch_related('tags').order_by('id')
+        expected = self.reference(TaskSerializer(tasks, many=True).data)
+        payloads = task_payloads(Task.objects.order_by('id').values(*TASK_FIELDS))
+
+        self.assertEqual(FastJSONRenderer().render(payloads), expected)
+        with patch('api.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(payloads), expected)
+
+    def test_renderer_falls_back(self):
+        """Test values orjson can't encode and indented output go through the stock renderer."""
+        data = {'big': 2 ** 70, 'when': timezone.now(), 'text': 'line sep \u2028'}
+        self.assertEqual(FastJSONRenderer().render(data), self.reference(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
+
+    def test_list_and_detail_responses(self):
+        """Test list, detail and export responses match the serializer output."""
+        factory = APIRequestFactory()
+        request = factory.get('/todo/tasks/')
+        force_authenticate(request, user=self.user)
+        response = TaskListView.as_view()(request)
+        response.render()
+        tasks = TaskSerializer(Task.objects.prefetch_related('tags').order_by('timestamp', 'id'), many=True).data
+        self.assertEqual(json.loads(response.content)['tasks'], json.loads(self.reference(tasks)))
+
+        task_cache.clear()
+        request = factory.get('/todo/task/', {'id': self.tasks[0].pk})
+        force_authenticate(request, user=self.user)
+        response = TaskDetailView.as_view()(request)
+        response.render()
+        self.assertIn(self.reference(TaskSerializer(self.tasks[0]).data), response.content)
+
+        request = factory.get('/todo/tasks/export')
+        force_authenticate(request, user=self.user)
+        lines = b''.join(TaskExportView.as_view()(request).streaming_content).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [json.loads(self.reference(task)) for task in TaskSerializer(
+                Task.objects.prefetch_related('tags').order_by('id'), many=True
+            ).data]
+        )
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and tagged tasks."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', description='A long description.', due_date='2024-05-01')
+            for i in range(3)
+        ]
+        self.home = Tag.objects.create(name='home')
+        self.tasks[0].tags.add(self.home)
+        task_cache.clear()
+
+    def get(self, view, path):
+        factory = APIRequestFactory()
+        request = factory.get(path)
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request)
+
+    def test_list_projects_requested_fields(self):
+        """Test the list returns only the requested fields, reads only their columns and skips tags."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(TaskListView, '/todo/tasks/?fields=id,title,status,due_date')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"description"', queries[-1]['sql'])
+        self.assertEqual(response.data['tasks'][0], {
+            'id': self.tasks[0].pk, 'title': 'Task 0', 'due_date': '2024-05-01', 'status': 'OPEN'
+        })
+
+    def test_list_pages_without_key_fields(self):
+        """Test cursors still work when id and timestamp aren't requested."""
+        response = self.get(TaskListView, '/todo/tasks/?fields=title&limit=2')
+        self.assertEqual(response.data['tasks'], [{'title': 'Task 0'}, {'title': 'Task 1'}])
+
+        cursor = response.data['next_cursor']
+        response = self.get(TaskListView, f'/todo/tasks/?fields=title&limit=2&cursor={cursor}')
+        self.assertEqual(response.data['tasks'], [{'title': 'Task 2'}])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_detail_and_export(self):
+        """Test detail and export trim their output, from the cache or from the database."""
+        path = f'/todo/task/?id={self.tasks[0].pk}&fields=title,tags'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(TaskDetailView, path)
+        self.assertEqual(response.data['task'], {'title': 'Task 0', 'tags': [{'id': self.home.pk, 'name': 'home'}]})
+        self.assertNotIn('"description"', queries[0]['sql'])
+        self.assertIsNone(task_cache.get(self.tasks[0].pk))
+
+        full = self.get(TaskDetailView, f'/todo/task/?id={self.tasks[0].pk}')
+        with self.assertNumQueries(0):
+            cached = self.get(TaskDetailView, path)
+        self.assertEqual(cached.data['task'], response.data['task'])
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertNotEqual(cached['ETag'], full['ETag'])
+
+        response = self.get(TaskExportView, '/todo/tasks/export?fields=id,status')
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{'id': task.pk, 'status': 'OPEN'} for task in self.tasks]
+        )
+
+    def test_unknown_field(self):
+        """Test unknown fields are rejected."""
+        for view, path in (
+            (TaskListView, '/todo/tasks/?fields=title,secret'),
+            (TaskDetailView, f'/todo/task/?id={self.tasks[0].pk}&fields=secret'),
+            (TaskExportView, '/todo/tasks/export?fields=secret'),
+        ):
+            response = self.get(view, path)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data['message'], 'Invalid fields: secret')
+
+@skipUnless(msgpack, 'msgpack is not installed')
+class MessagePackTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and a tagged task."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.task = Task.objects.create(title='Packed', description='Sent as MessagePack.', due_date='2025-01-01')
+        self.task.tags.add(Tag.objects.create(name='binary'))
+        self.factory = APIRequestFactory()
+
+    def call(self, view, request):
+        force_authenticate(request, user=self.user)
+        response = view.as_view()(request)
+        response.render()
+        return response
+
+    def test_reads(self):
+        """Test list and detail render MessagePack when asked and JSON otherwise."""
+        for view, path, params in [(TaskListView, '/todo/tasks/', {}), (TaskDetailView, '/todo/task/', {'id': self.task.pk})]:
+            packed = self.call(view, self.factory.get(path, params, HTTP_ACCEPT='application/msgpack'))
+            self.assertEqual(packed['Content-Type'], 'application/msgpack')
+            plain = self.call(view, self.factory.get(path, params))
+            self.assertEqual(msgpack.unpackb(packed.content), json.loads(plain.content))
+            self.assertNotEqual(packed['ETag'], plain['ETag'])
+
+    def test_writes(self):
+        """Test create and update accept MessagePack bodies and reject malformed ones."""
+        body = msgpack.packb({'title': 'New', 'description': 'Packed body.', 'tags': [{'name': 'binary'}]})
+        response = self.call(TaskCreateView, self.factory.post(
+            '/todo/tasks/create/', body, content_type='application/msgpack', HTTP_ACCEPT='application/msgpack'
+        ))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = msgpack.unpackb(response.content)['task']
+        self.assertEqual(created['tags'][0]['name'], 'binary')
+
+        body = msgpack.packb({'pk': created['id'], 'status': 'COMPLETED'})
+        response = self.call(TaskUpdateView, self.factory.post(
+            '/todo/tasks/update', body, content_type='application/msgpack'
+        ))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.get(pk=created['id']).status, 'COMPLETED')
+
+        response = self.call(TaskCreateView, self.factory.post(
+            '/todo/tasks/create/', b'\xc1', content_type='application/msgpack'
+        ))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bench_formats(self):
+        """Test manage.py bench_formats reports size and timings for each format."""
+        stdout = StringIO()
+        call_command('bench_formats', count=20, repeat=2, stdout=stdout)
+        for name in ('json', 'json-stdlib', 'msgpack'):
+            self.assertIn(f'\n{name} ', stdout.getvalue())
+
+
+class BenchmarkTests(APITestCase):
+    def setUp(self):
+        """Setup the user the benchmark authenticates as."""
+        User.objects.create_user(username='bench', password='bench')
+
+    def test_benchmark_covers_every_endpoint(self):
+        """Test a small run seeds tasks and reports sane metrics for every endpoint without errors."""
+        results = Benchmark(ClientDriver(), 'bench', 'bench', tasks=30, tags=4, requests=5, concurrency=1).run()
+
+        self.assertEqual(len(results['endpoints']), 14)
+        for label, result in results['endpoints'].items():
+            self.assertEqual(result['requests'], 5, label)
+            self.assertEqual(result['errors'], 0, label)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_per_request'], 0)
+        self.assertEqual(results['meta']['tasks'], 30)
+        self.assertEqual(Tag.objects.filter(name__startswith='tag-').count(), 4)
+        json.dumps(results)
+
+    def test_compare(self):
+        """Test only changes beyond the tolerance in the wrong direction count as regressions."""
+        baseline = {'endpoints': {'GET tasks/': {'p95_ms': 10.0, 'throughput_rps': 100.0, 'queries_per_request': 3.0}}}
+        results = {'endpoints': {'GET tasks/': {'p95_ms': 10.5, 'throughput_rps': 50.0, 'queries_per_request': 4.0}}}
+
+        regressed = {row[1]: row[5] for row in compare(results, baseline, tolerance=0.1)}
+        self.assertEqual(regressed, {'p95_ms': False, 'throughput_rps': True, 'queries_per_request': True})
+
+
+class ArchiveTests(APITestCase):
+    def setUp(self):
+        """Setup a test user and a mix of old and recent, finished and open tasks."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.home = Tag.objects.create(name='home')
+        self.work = Tag.objects.create(name='work')
+        self.done = Task.objects.create(title='Done', description='Old and finished.', status='COMPLETED')
+        self.done.tags.add(self.home, self.work)
+        self.cancelled = Task.objects.create(title='Dropped', description='Old and cancelled.', status='CANCELLED')
+        self.cancelled.tags.add(self.work)
+        self.open = Task.objects.create(title='Open', description='Old but still open.')
+        self.recent = Task.objects.create(title='Recent', description='Finished today.', status='COMPLETED')
+        old = timezone.now() - timezone.timedelta(days=60)
+        Task.objects.filter(pk__in=[self.done.pk, self.cancelled.pk, self.open.pk]).update(updated_at=old)
+
+    def archive(self):
+        out = StringIO()
+        call_command('archive_tasks', '--older-than', '30', '--chunk-size', '1', stdout=out)
+        return out.getvalue()
+
+    def get(self, view, path):
+        factory = APIRequestFactory()
+        request = factory.get(path)
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request)
+
+    def test_archive_moves_old_finished_tasks(self):
+        """Test old finished tasks move to the archive with their tags, tombstones and counters."""
+        self.assertIn('Archived 2 tasks', self.archive())
+
+        self.assertEqual(
+            set(Task.objects.values_list('pk', flat=True)), {self.open.pk, self.recent.pk}
+        )
+        archived = ArchivedTask.objects.get(pk=self.done.pk)
+        self.assertEqual((archived.title, archived.status), ('Done', 'COMPLETED'))
+        self.assertEqual(archived.timestamp, self.done.timestamp)
+        self.assertEqual(list(archived.tags.values_list('name', flat=True)), ['home', 'work'])
+        self.assertFalse(Task.tags.through.objects.filter(task_id=self.done.pk).exists())
+        self.assertEqual(
+            set(TaskTombstone.objects.values_list('task_id', flat=True)), {self.done.pk, self.cancelled.pk}
+        )
+        self.assertEqual(counter_drift(), {})
+        self.assertIn('Archived 0 tasks', self.archive())
+
+    def test_reads_include_archived_on_request(self):
+        """Test list and detail read the hot table unless include_archived is set."""
+        done = dict(TaskSerializer(Task.objects.get(pk=self.done.pk)).data)
+        self.archive()
+
+        response = self.get(TaskListView, '/todo/tasks/')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.open.pk, self.recent.pk])
+        response = self.get(TaskDetailView, f'/todo/task/?id={self.done.pk}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.get(TaskDetailView, f'/todo/task/?id={self.done.pk}&include_archived=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['task'], done)
+
+        ids, cursor = [], None
+        while True:
+            path = '/todo/tasks/?include_archived=true&limit=1' + (f'&cursor={cursor}' if cursor else '')
+            response = self.get(TaskListView, path)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [task['id'] for task in response.data['tasks']]
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(ids, [self.done.pk, self.cancelled.pk, self.open.pk, self.recent.pk])
+
+        response = self.get(TaskListView, '/todo/tasks/?include_archived=1&tag=work')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.done.pk, self.cancelled.pk])
+        self.assertEqual(response.data['tasks'][0]['tags'], done['tags'])
+
+# The default database stands in for a replica, since the tests only have one.
+@override_settings(DATABASE_ROUTERS=['api.routers.ReplicaRouter'], DATABASE_REPLICAS=['default'])
+class ReplicaRoutingTests(APITestCase):
+    def setUp(self):
+        """Setup two test users and a task."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.other = User.objects.create_user(username='otheruser', password='testpassword')
+        self.task = Task.objects.create(title='Replicated', description='Read from a replica.')
+        primary_pins.clear()
+        replica_health.clear()
+
+    def read_aliases(self, user, view, path):
+        """Return the database alias the view's payloads were read through."""
+        seen = []
+
+        def record(rows, *args, **kwargs):
+            seen.append(read_alias())
+            return task_payloads(rows, *args, **kwargs)
+
+        factory = APIRequestFactory()
+        request = factory.get(path)
+        force_authenticate(request, user=user)
+        with patch('api.views.task_payloads', side_effect=record):
+            response = view.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return seen
+
+    def test_reads_use_replica(self):
+        """Test list and detail reads are routed to the replica and released afterwards."""
+        self.assertEqual(self.read_aliases(self.user, TaskListView, '/todo/tasks/'), ['default'])
+        self.assertEqual(self.read_aliases(self.user, TaskDetailView, f'/todo/task/?id={self.task.pk}'), ['default'])
+        self.assertIsNone(read_alias())
+
+    def test_writer_is_pinned_to_primary(self):
+        """Test a user who just wrote reads from the primary while others keep using the replica."""
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/update/', {'pk': self.task.pk, 'title': 'Renamed'}, format='json')
+        force_authenticate(request, user=self.user)
+        response = TaskUpdateView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(primary_pins.is_pinned(self.user))
+        self.assertEqual(self.read_aliases(self.user, TaskListView, '/todo/tasks/'), [None])
+        self.assertEqual(self.read_aliases(self.other, TaskListView, '/todo/tasks/'), ['default'])
+
+    def test_failed_write_does_not_pin(self):
+        """Test a rejected write leaves the user on the replica."""
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/update/', {'pk': self.task.pk, 'title': ''}, format='json')
+        force_authenticate(request, user=self.user)
+        response = TaskUpdateView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(primary_pins.is_pinned(self.user))
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        """Test a replica that can't connect is skipped until its retry time."""
+        with patch.object(connections['default'], 'ensure_connection', side_effect=OperationalError) as connect:
+            self.assertIsNone(choose_replica(self.user))
+            self.assertIsNone(choose_replica(self.user))
+        self.assertEqual(connect.call_count, 1)
+
+    def test_router(self):
+        """Test writes always go to the primary and replicas are never migrated."""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Task), 'default')
+        self.assertIsNone(router.db_for_read(Task))
+        self.assertFalse(router.allow_migrate('default', 'api'))
+        with override_settings(DATABASE_REPLICAS=['replica']):
+            self.assertIsNone(router.allow_migrate('default', 'api'))
+            self.assertFalse(router.allow_migrate('replica', 'api'))
+
+@override_settings(DATABASE_ROUTERS=['api.routers.ReplicaRouter'], DATABASE_REPLICAS=['file_replica'])
+class SQLiteFileReplicaTests(APITransactionTestCase):
+    """
+    A transaction test case, since the primary can only be copied with its
+    writes committed.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Setup a connection to a SQLite file standing in for a replica."""
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        # Assigned rather than added to DATABASES, so the test runner treats
+        # it as a dynamically created connection.
+        connections['file_replica'] = connections['default'].__class__(
+            {**connections['default'].settings_dict, 'NAME': f'{cls.directory.name}/replica.sqlite3'},
+            'file_replica',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['file_replica'].close()
+        del connections['file_replica']
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        """Setup two test users and a task."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.other = User.objects.create_user(username='otheruser', password='testpassword')
+        self.copied = Task.objects.create(title='Copied errand', description='On both databases.')
+        primary_pins.clear()
+        replica_health.clear()
+        task_cache.clear()
+
+    def get(self, user, view, path):
+        factory = APIRequestFactory()
+        request = factory.get(path)
+        force_authenticate(request, user=user)
+        return view.as_view()(request)
+
+    def test_reads_follow_the_copy(self):
+        """Test list, detail and search read the replica file, which only changes when synced."""
+        out = StringIO()
+        call_command('sync_replicas', stdout=out)
+        self.assertIn('Copied the primary to file_replica', out.getvalue())
+        fresh = Task.objects.create(title='Fresh errand', description='Only on the primary.')
+        Task.objects.filter(pk=self.copied.pk).delete()
+
+        response = self.get(self.other, TaskListView, '/todo/tasks/')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.copied.pk])
+        response = self.get(self.other, TaskSearchView, '/todo/tasks/search?q=errand')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.copied.pk])
+        response = self.get(self.other, TaskDetailView, f'/todo/task/?id={fresh.pk}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        call_command('sync_replicas', stdout=out)
+        response = self.get(self.other, TaskSearchView, '/todo/tasks/search?q=errand')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [fresh.pk])
+
+    def test_writer_reads_the_primary(self):
+        """Test a user who just wrote sees their change before the replica is synced."""
+        call_command('sync_replicas', stdout=StringIO())
+        factory = APIRequestFactory()
+        request = factory.post(
+            '/todo/tasks/create/', {'title': 'New errand', 'description': 'Just written.'}, format='json'
+        )
+        force_authenticate(request, user=self.user)
+        created = TaskCreateView.as_view()(request).data['task']
+
+        response = self.get(self.user, TaskListView, '/todo/tasks/')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.copied.pk, created['id']])
+        response = self.get(self.other, TaskListView, '/todo/tasks/')
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.copied.pk])
+
+    def test_writer_never_gets_replica_payload_from_cache(self):
+        """Test another user's replica read of a task doesn't hide the writer's update from them."""
+        call_command('sync_replicas', stdout=StringIO())
+        factory = APIRequestFactory()
+        request = factory.post('/todo/tasks/update/', {'pk': self.copied.pk, 'title': 'Renamed errand'}, format='json')
+        force_authenticate(request, user=self.user)
+        self.assertEqual(TaskUpdateView.as_view()(request).status_code, status.HTTP_200_OK)
+
+        path = f'/todo/task/?id={self.copied.pk}'
+        self.assertEqual(self.get(self.other, TaskDetailView, path).data['task']['title'], 'Copied errand')
+        self.assertEqual(self.get(self.user, TaskDetailView, path).data['task']['title'], 'Renamed errand')
+
+    def test_sync_refuses_open_transaction(self):
+        """Test copying from inside a transaction fails instead of waiting on its own writes."""
+        with transaction.atomic():
+            with self.assertRaises(CommandError):
+                call_command('sync_replicas', stdout=StringIO())
+
+@modify_settings(MIDDLEWARE={'prepend': 'api.middleware.MetricsMiddleware'})
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+class MetricsMiddlewareTests(APITestCase):
+    def setUp(self):
+        """Setup a test user, a task and a fresh metrics registry."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        Task.objects.create(title='Measured', description='Counted in metrics.')
+        registry.__init__()
+
+    def test_requests_are_recorded(self):
+        """Test latency, queries, render time and size are exposed per URL name and status."""
+        self.client.get('/todo/tasks/')
+        self.client.get('/todo/tasks/')
+        self.client.get('/todo/task/', {'id': 9999})
+        b''.join(self.client.get('/todo/tasks/export').streaming_content)
+
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('api_requests_total{view="task-list",method="GET",status="200"} 2', body)
+        self.assertIn('api_requests_total{view="task-detail",method="GET",status="404"} 1', body)
+        self.assertIn(
+            'api_request_duration_seconds_count{view="task-list",method="GET",status="200"} 2', body
+        )
+        self.assertIn(
+            'api_request_duration_seconds_bucket{view="task-list",method="GET",status="200",le="+Inf"} 2', body
+        )
+        # Table version, the page of rows and their tags, per request.
+        self.assertIn('api_db_queries_total{view="task-list",method="GET",status="200"} 6', body)
+        self.assertRegex(body, r'api_render_seconds_total\{view="task-list",method="GET",status="200"\} (?!0\n)')
+        self.assertRegex(body, r'api_response_bytes_total\{view="task-export",method="GET",status="200"\} [1-9]')
+        # Streamed bodies count the queries run while streaming.
+        self.assertIn('api_db_queries_total{view="task-export",method="GET",status="200"} 2', body)
+        self.assertIn('# TYPE api_task_cache_misses_total counter', body)
+
+    def test_processes_are_aggregated(self):
+        """Test snapshots written by several processes are summed."""
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            other = MetricsRegistry()
+            other.observe(('task-list', 'GET', '200'), 0.02, 3, 0.001, 0.001, 100)
+            other.flush()
+            self.client.get('/todo/tasks/')
+
+            body = self.client.get('/metrics').content.decode()
+        self.assertIn('api_requests_total{view="task-list",method="GET",status="200"} 2', body)
+        self.assertIn('api_db_queries_total{view="task-list",method="GET",status="200"} 6', body)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='scrape-secret')
+    def test_metrics_are_restricted(self):
+        """Test /metrics turns away anonymous requests and accepts the bearer token."""
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_async_requests_are_recorded(self):
+        """Test requests served under ASGI count the queries the async ORM runs for them."""
+        async def get_response(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+        headers = {'Authorization': f'Token {await sync_to_async(issue_token)(self.user)}'}
+        response = await self.async_client.get('/todo/async/tasks/', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        body = (await self.async_client.get('/metrics')).content.decode()
+        self.assertIn('api_requests_total{view="async-task-list",method="GET",status="200"} 1', body)
+        # The token's user, then the same three queries as the sync list.
+        self.assertIn('api_db_queries_total{view="async-task-list",method="GET",status="200"} 4', body)
+
+
+@modify_settings(MIDDLEWARE={'prepend': 'api.middleware.ProfilingMiddleware'})
+class ProfilingMiddlewareTests(APITestCase):
+    def setUp(self):
+        """Setup a test user, a task and an empty profile directory."""
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='Profiled', description='Slow sometimes.')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        profile_settings = override_settings(PROFILE_DIR=self.directory.name, PROFILE_MAX_FILES=2)
+        profile_settings.enable()
+        self.addCleanup(profile_settings.disable)
+
+    def test_signed_header(self):
+        """Test only requests with a valid signed header are profiled, with their SQL."""
+        self.assertNotIn('X-Profile-Id', self.client.get('/todo/tasks/'))
+        self.assertNotIn('X-Profile-Id', self.client.get('/todo/tasks/', headers={'X-Profile': 'forged'}))
+
+        response = self.client.post(
+            '/todo/tasks/update', {'pk': self.task.pk, 'title': 'Renamed'}, format='json',
+            headers={'X-Profile': issue_profile_token()},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        summary = load_summary(response['X-Profile-Id'])
+        self.assertEqual(summary['view'], 'task-update-no-slash')
+        self.assertEqual(summary['status'], 200)
+        self.assertEqual(summary['query_count'], len(summary['queries']))
+        self.assertTrue(any(query['sql'].startswith('UPDATE "api_task"') for query in summary['queries']))
+        self.assertTrue(summary['top_functions'])
+
+    def test_sampling_and_ring(self):
+        """Test sampled requests are profiled and only the newest PROFILE_MAX_FILES are kept."""
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            ids = [self.client.get('/todo/tasks/')['X-Profile-Id'] for _ in range(3)]
+
+        self.assertEqual(list_profile_ids(), ids[1:])
+        stdout = StringIO()
+        call_command('profiles', stdout=stdout)
+        self.assertIn('2 profiles', stdout.getvalue())
+        stdout = StringIO()
+        call_command('profiles', 'show', stdout=stdout)
+        self.assertIn('GET /todo/tasks/ -> 200 (task-list)', stdout.getvalue())
+        self.assertIn('function calls', stdout.getvalue())
+
+    async def test_async_requests(self):
+        """Test requests served under ASGI are profiled natively, with their SQL."""
+        async def get_response(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(ProfilingMiddleware(get_response)))
+        headers = {
+            'Authorization': f'Token {await sync_to_async(issue_token)(self.user)}',
+            'X-Profile': await sync_to_async(issue_profile_token)(),
+        }
+        response = await self.async_client.get('/todo/async/tasks/', headers=headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        summary = await sync_to_async(load_summary)(response['X-Profile-Id'])
+        self.assertEqual(summary['view'], 'async-task-list')
+        self.assertEqual(summary['query_count'], 4)
+        self.assertTrue(any(query['sql'].startswith('SELECT') for query in summary['queries']))
@@ -1,14 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from .views import TaskCreateView, TaskDetailView, TaskListView, TaskUpdateView, TaskDeleteView
+from . import async_urls
+from .views import (
+    TaskCreateView, TaskBulkCreateView, TaskDetailView, TaskListView, TaskUpdateView, TaskDeleteView,
+    TaskBatchView, TaskChangesView, TaskExportView, TaskImportView,
+    TaskSearchView, TaskStatsView, TokenObtainView,
+)
 
 urlpatterns = [
+    path('auth/token/', TokenObtainView.as_view(), name='auth-token'),    # Exchange Basic credentials for a token
+
     path('tasks/', TaskListView.as_view(), name='task-list'),     # Retrieve all tasks
+    path('tasks/changes', TaskChangesView.as_view(), name='task-changes'),     # Tasks changed since a sync token
+    path('tasks/export', TaskExportView.as_view(), name='task-export'),     # Stream every task as NDJSON
+    path('tasks/import', TaskImportView.as_view(), name='task-import'),     # Load tasks from an NDJSON body
+    path('tasks/search', TaskSearchView.as_view(), name='task-search'),     # Ranked full-text search
+    path('tasks/stats', TaskStatsView.as_view(), name='task-stats'),     # Counts by status and tag, and overdue
 
     path('tasks/create/', TaskCreateView.as_view(), name='task-create'),    # Create a new task
-    path('tasks/create', TaskCreateView.as_view(), name='task-create'),    # Create a new task (no slash)
+    path('tasks/create', TaskCreateView.as_view(), name='task-create-no-slash'),    # Create a new task (no slash)
+
+    path('tasks/bulk_create/', TaskBulkCreateView.as_view(), name='task-bulk-create'),    # Create many tasks at once
 
 
-    path('task/', TaskDetailView.as_view(), name='task-create'),    # Retrieve a single task by ID
+    path('task/', TaskDetailView.as_view(), name='task-detail'),    # Retrieve a single task by ID
 
 
     path('tasks/update/', TaskUpdateView.as_view(), name='task-update'),  # Update a task by ID
@@ -16,6 +31,11 @@ urlpatterns = [
 
     path('tasks/delete', TaskDeleteView.as_view(), name='task-delete'),  # Delete a task by ID
 
+    path('tasks/batch/', TaskBatchView.as_view(), name='task-batch'),  # Update and delete many tasks at once
+
 
 ]
 
+if getattr(settings, 'API_ASYNC_VIEWS', False):
+    # Serve the async variants at the regular URLs too; listed first, they win.
+    urlpatterns = async_urls.urlpatterns + urlpatterns
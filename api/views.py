@@ -1,19 +1,79 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.authentication import BasicAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework import status
-from .models import Task
-from .serializers import TaskSerializer
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from .archive import include_archived
+from .authentication import CachedBasicAuthentication, SignedTokenAuthentication, TOKEN_MAX_AGE, issue_token
+from .cache import task_cache
+from .conditional import digest, etag_matches, make_etag, not_modified, table_etag
+from .models import ArchivedTask, Task
+from .serializers import TaskSerializer, bulk_update_tasks
+from .filters import FilterError, filter_tasks, parse_fields
+from .ndjson import IMPORT_BATCH_SIZE, export_tasks, import_tasks
+from .pagination import PaginationError, paginate_merged, paginate_tasks
+from .payloads import PAYLOAD_FIELDS, row_fields, task_payloads
+from .parsers import API_PARSER_CLASSES
+from .renderers import API_RENDERER_CLASSES, FAST_RENDERER_CLASSES
+from .routers import primary_pins, read_alias, release_replica, use_replica
+from .search import SearchError, search_tasks
+from .stats import task_stats
+from .tasks import bulk_delete_tasks
+from .sync import changes_since
 
-class TaskCreateView(APIView):
-    authentication_classes = [BasicAuthentication]
+BULK_CREATE_LIMIT = 1000
+BATCH_LIMIT = 1000
+
+class ReplicaRoutingMixin:
+    """
+    Serve safe requests from a read replica when ``read_from_replica`` is
+    set, and pin the user to the primary for ``REPLICA_STICKY_SECONDS``
+    after any successful write so they read their own changes.
+    """
+    read_from_replica = False
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.read_from_replica and request.method in SAFE_METHODS:
+            self._replica_token = use_replica(request.user)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            # Here rather than in finalize_response, which an unhandled
+            # exception skips.
+            if self._replica_token is not None:
+                release_replica(self._replica_token)
+        if (request.method not in SAFE_METHODS and response.status_code < 400
+                and self.request.user.is_authenticated):
+            primary_pins.pin(self.request.user)
+        return response
+
+class TokenObtainView(APIView):
+    authentication_classes = [CachedBasicAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def post(self, request):
+        return Response({
+            'message': 'Token issued successfully',
+            'token': issue_token(request.user),
+            'expires_in': TOKEN_MAX_AGE
+        }, status=status.HTTP_200_OK)
+
+class TaskCreateView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = API_RENDERER_CLASSES
+    parser_classes = API_PARSER_CLASSES
+
     def post(self, request):
         serializer = TaskSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             return Response({
                 'message': 'Task created successfully',
                 'task': serializer.data
@@ -23,9 +83,43 @@ class TaskCreateView(APIView):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
-class TaskDetailView(APIView):
-    authentication_classes = [BasicAuthentication]
+class TaskBulkCreateView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response({
+                'message': 'Expected a list of tasks'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(request.data) > BULK_CREATE_LIMIT:
+            return Response({
+                'message': f'At most {BULK_CREATE_LIMIT} tasks can be created at once'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = TaskSerializer(data=request.data, many=True)
+        if serializer.is_valid():
+            with transaction.atomic():
+                tasks = serializer.save()
+
+            tasks = Task.objects.filter(
+                pk__in=[task.pk for task in tasks]
+            ).prefetch_related('tags').order_by('id')
+            return Response({
+                'message': 'Tasks created successfully',
+                'tasks': TaskSerializer(tasks, many=True).data
+            }, status=status.HTTP_201_CREATED)
+        return Response({
+            'message': 'Failed to create tasks',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+class TaskDetailView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
+    renderer_classes = API_RENDERER_CLASSES
 
     def get(self, request):
         task_id = request.query_params.get('id')
@@ -36,20 +130,62 @@ class TaskDetailView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            task = Task.objects.get(pk=task_id)
-            serializer = TaskSerializer(task)
-            return Response({
-                'message': 'Task retrieved successfully',
-                'task': serializer.data
-            }, status=status.HTTP_200_OK)
-        except Task.DoesNotExist:
+            pk = int(task_id)
+        except ValueError:
+            pk = None
+
+        try:
+            fields = parse_fields(request.query_params)
+        except FilterError as exc:
             return Response({
-                'message': 'Task not found'
-            }, status=status.HTTP_404_NOT_FOUND)
+                'message': str(exc)
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-class TaskListView(APIView):
-    authentication_classes = [BasicAuthentication]
+        cached = task_cache.get(pk) if pk is not None else None
+        if cached is not None and fields != PAYLOAD_FIELDS:
+            payload = {field: cached[0][field] for field in fields}
+            cached = (payload, digest(payload))
+        elif cached is None:
+            # Only full payloads are cached; a sparse read loads just its
+            # own columns.
+            columns = row_fields(fields)
+            rows = Task.objects.filter(pk=pk).values(*columns) if pk is not None else []
+            payloads = task_payloads(rows, fields=fields)
+            if payloads:
+                cached = (payloads[0], digest(payloads[0]))
+                if fields == PAYLOAD_FIELDS and read_alias() is None:
+                    # Only primary reads are cached: a lagging replica's copy
+                    # would be served to writers pinned to the primary too.
+                    task_cache.set(pk, cached)
+            elif pk is not None and include_archived(request.query_params):
+                # Archived payloads stay out of the cache, which is kept for
+                # the working set.
+                rows = ArchivedTask.objects.filter(pk=pk).values(*columns)
+                payloads = task_payloads(rows, [ArchivedTask], fields)
+                if payloads:
+                    cached = (payloads[0], digest(payloads[0]))
+            if cached is None:
+                return Response({
+                    'message': 'Task not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+
+        payload, payload_digest = cached
+        etag = make_etag(request, payload_digest)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = Response({
+            'message': 'Task retrieved successfully',
+            'task': payload
+        }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
+
+class TaskListView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
+    renderer_classes = API_RENDERER_CLASSES
 
     def get(self, request):
 
@@ -58,16 +194,136 @@ class TaskListView(APIView):
                 'message': 'Page not found'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        tasks = Task.objects.all()
+        etag = table_etag(request, 'task')
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        sources = [Task]
+        if include_archived(request.query_params):
+            sources.append(ArchivedTask)
+
+        try:
+            fields = parse_fields(request.query_params)
+            columns = row_fields(fields, 'id', 'timestamp')
+            querysets = [
+                filter_tasks(model.objects.all(), request.query_params).values(*columns)
+                for model in sources
+            ]
+            if len(querysets) > 1:
+                rows, next_cursor = paginate_merged(querysets, request.query_params)
+            else:
+                rows, next_cursor = paginate_tasks(querysets[0], request.query_params)
+        except (FilterError, PaginationError) as exc:
+            return Response({
+                'message': str(exc)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response({
+            'message': 'Tasks retrieved successfully',
+            'tasks': task_payloads(rows, sources, fields),
+            'next_cursor': next_cursor
+        }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
+
+class TaskExportView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    def get(self, request):
+        try:
+            tasks = filter_tasks(Task.objects.all(), request.query_params)
+            fields = parse_fields(request.query_params)
+        except FilterError as exc:
+            return Response({
+                'message': str(exc)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            export_tasks(tasks, fields=fields), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="tasks.ndjson"'
+        return response
+
+class TaskImportView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            batch_size = int(request.query_params.get('batch_size', IMPORT_BATCH_SIZE))
+        except ValueError:
+            batch_size = 0
+        if not 1 <= batch_size <= BULK_CREATE_LIMIT:
+            return Response({
+                'message': f'batch_size must be between 1 and {BULK_CREATE_LIMIT}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Read the body line by line instead of letting a parser load it whole.
+        report = import_tasks(request.stream or [], batch_size)
+        return Response({
+            'message': 'Tasks imported',
+            **report
+        }, status=status.HTTP_200_OK)
+
+class TaskSearchView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    def get(self, request):
+        try:
+            tasks, next_offset = search_tasks(request.query_params)
+        except SearchError as exc:
+            return Response({
+                'message': str(exc)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         serializer = TaskSerializer(tasks, many=True)
         return Response({
             'message': 'Tasks retrieved successfully',
-            'tasks': serializer.data
+            'tasks': serializer.data,
+            'next_offset': next_offset
+        }, status=status.HTTP_200_OK)
+
+class TaskChangesView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            tasks, deleted, sync_token, has_more = changes_since(request.query_params)
+        except PaginationError as exc:
+            return Response({
+                'message': str(exc)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = TaskSerializer(tasks, many=True)
+        return Response({
+            'message': 'Changes retrieved successfully',
+            'tasks': serializer.data,
+            'deleted': deleted,
+            'sync_token': sync_token,
+            'has_more': has_more
         }, status=status.HTTP_200_OK)
 
-class TaskUpdateView(APIView):
-    authentication_classes = [BasicAuthentication]
+class TaskStatsView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    def get(self, request):
+        return Response({
+            'message': 'Task statistics retrieved successfully',
+            'stats': task_stats()
+        }, status=status.HTTP_200_OK)
+
+class TaskUpdateView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = API_RENDERER_CLASSES
+    parser_classes = API_PARSER_CLASSES
 
     def post(self, request):
         try:
@@ -79,16 +335,21 @@ class TaskUpdateView(APIView):
                     'message': 'Task ID is required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Attempt to get the task with the given 'pk'
-            task = Task.objects.get(pk=pk)
-            serializer = TaskSerializer(task, data=request.data, partial=True)
+            with transaction.atomic():
+                # Attempt to get the task with the given 'pk', with the tags the
+                # serializer diffs against and renders. The row stays locked
+                # until the save, so the diff and the counter deltas start
+                # from its current state rather than one a concurrent write
+                # is replacing.
+                task = Task.objects.select_for_update().prefetch_related('tags').get(pk=pk)
+                serializer = TaskSerializer(task, data=request.data, partial=True)
 
-            if serializer.is_valid():
-                serializer.save()
-                return Response({
-                    'message': 'Task updated successfully',
-                    'task': serializer.data
-                }, status=status.HTTP_200_OK)
+                if serializer.is_valid():
+                    serializer.save()
+                    return Response({
+                        'message': 'Task updated successfully',
+                        'task': serializer.data
+                    }, status=status.HTTP_200_OK)
 
             return Response({
                 'message': 'Failed to update task',
@@ -99,8 +360,8 @@ class TaskUpdateView(APIView):
                 'message': 'Task not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-class TaskDeleteView(APIView):
-    authentication_classes = [BasicAuthentication]
+class TaskDeleteView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def delete(self, request):
@@ -116,8 +377,9 @@ class TaskDeleteView(APIView):
                     'message': 'Task ID is required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            task = Task.objects.get(pk=pk)
-            task.delete()
+            with transaction.atomic():
+                task = Task.objects.select_for_update().get(pk=pk)
+                task.delete()
             return Response({
                 'message': 'Task deleted successfully'
             }, status=status.HTTP_204_NO_CONTENT)
@@ -125,3 +387,78 @@ class TaskDeleteView(APIView):
             return Response({
                 'message': 'Task not found'
             }, status=status.HTTP_404_NOT_FOUND)
+
+class TaskBatchView(ReplicaRoutingMixin, APIView):
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        operations = request.data
+        if not isinstance(operations, list):
+            return Response({
+                'message': 'Expected a list of operations'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(operations) > BATCH_LIMIT:
+            return Response({
+                'message': f'At most {BATCH_LIMIT} operations can be applied at once'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        pks = []
+        for operation in operations:
+            try:
+                pks.append(int(operation['pk']))
+            except (TypeError, KeyError, ValueError):
+                pks.append(None)
+
+        with transaction.atomic():
+            # Lock every row the batch touches until it's applied, so updates are
+            # diffed and counted against the rows' current state.
+            tasks = Task.objects.select_for_update().in_bulk([pk for pk in pks if pk is not None])
+
+            errors, updates, deletes, seen = [], [], [], set()
+            for operation, pk in zip(operations, pks):
+                if not isinstance(operation, dict):
+                    errors.append({'non_field_errors': ['Expected an object']})
+                    continue
+                if operation.get('op') not in ('update', 'delete'):
+                    errors.append({'op': ['Must be "update" or "delete"']})
+                    continue
+                if pk is None:
+                    errors.append({'pk': ['Task ID is required']})
+                    continue
+                if pk not in tasks:
+                    errors.append({'pk': ['Task not found']})
+                    continue
+                if pk in seen:
+                    errors.append({'pk': ['Task appears more than once in the batch']})
+                    continue
+                seen.add(pk)
+
+                if operation['op'] == 'delete':
+                    deletes.append(pk)
+                    errors.append({})
+                    continue
+
+                serializer = TaskSerializer(tasks[pk], data=operation, partial=True)
+                if serializer.is_valid():
+                    updates.append((tasks[pk], serializer.validated_data))
+                    errors.append({})
+                else:
+                    errors.append(serializer.errors)
+
+            if any(errors):
+                return Response({
+                    'message': 'Failed to apply batch',
+                    'errors': errors
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            bulk_update_tasks(updates)
+            if deletes:
+                bulk_delete_tasks(deletes)
+
+        return Response({
+            'message': 'Batch applied successfully',
+            'updated': [task.pk for task, data in updates],
+            'deleted': deletes
+        }, status=status.HTTP_200_OK)
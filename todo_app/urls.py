@@ -16,10 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from api.metrics import metrics_view
 from . import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('todo/async/', include('api.async_urls')),
     path('todo/', include('api.urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('', views.home_view)
 ]